@@ -0,0 +1,151 @@
+# benchmark.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Timing harness for the search code.
+
+  python benchmark.py -l bigMaze            # time the search benchmark on bigMaze
+  python benchmark.py -b search -l FILE.lay --json
+  python benchmark.py -b food --foodLayouts smallSearch,trickySearch
+
+With --json the results are printed as a single JSON object, which is how
+the scaling benchmark in the multiagent project collects them.
+"""
+
+import optparse
+import sys
+import time
+
+import layout
+import pacman
+import search
+import searchAgents
+
+
+def startState(lay):
+    state = pacman.GameState()
+    state.initialize(lay, 0)
+    return state
+
+
+def benchmarkSearch(lay, options):
+    """
+    Times breadth first search and A* with the Manhattan heuristic on the
+    problem of walking from Pacman's start to square (1, 1).
+    """
+    state = startState(lay)
+    results = {}
+    for name, solve in [('bfs', search.breadthFirstSearch),
+                        ('astar', lambda problem: search.aStarSearch(
+                            problem, searchAgents.manhattanHeuristic))]:
+        problem = searchAgents.PositionSearchProblem(
+            state, goal=(1, 1), warn=False, visualize=False)
+        startTime = time.time()
+        path = solve(problem)
+        results[name + 'Seconds'] = time.time() - startTime
+        results[name + 'Expanded'] = problem._expanded
+        results[name + 'PathLength'] = len(path)
+    return results
+
+
+def farthestFoodHeuristic(state, problem):
+    """
+    The maze distance to the farthest pellet, the food heuristic the
+    spanning tree one replaced, kept for comparison.
+    """
+    position, foodGrid = state
+    distances = problem.startingGameState.data.layout.getMazeDistances()
+    return distances.getMaxDistance(position, foodGrid.asList())
+
+
+def benchmarkFoodSearch(lay, options):
+    """
+    Times A* on the FoodSearchProblem of each of the food layouts (not the
+    layout given by -l), with foodHeuristic and with the farthest pellet
+    heuristic, reporting seconds and nodes expanded.
+    """
+    results = {}
+    for name in options.foodLayouts.split(','):
+        foodLayout = layout.getLayout(name)
+        if foodLayout == None:
+            raise Exception('The layout ' + name + ' cannot be found')
+        state = startState(foodLayout)
+        for heuristicName, heuristic in [('spanningTree', searchAgents.foodHeuristic),
+                                         ('farthest', farthestFoodHeuristic)]:
+            problem = searchAgents.FoodSearchProblem(state)
+            startTime = time.time()
+            path = search.aStarSearch(problem, heuristic)
+            prefix = name + '.' + heuristicName
+            results[prefix + 'Seconds'] = time.time() - startTime
+            results[prefix + 'Expanded'] = problem._expanded
+            results[prefix + 'PathLength'] = len(path)
+    return results
+
+
+BENCHMARKS = [
+    ('search', benchmarkSearch),
+    ('food', benchmarkFoodSearch),
+]
+
+# The food benchmark ignores -l, so it only runs when asked for with -b
+DEFAULT_BENCHMARKS = ['search']
+
+
+def readCommand(argv):
+    parser = optparse.OptionParser(
+        usage='python benchmark.py [options]')
+    parser.add_option('-b', '--benchmark', dest='benchmarks', action='append',
+                      help='Benchmark to run (may be repeated): %s [Default: %s]' %
+                      (', '.join([name for name, fn in BENCHMARKS]),
+                       ', '.join(DEFAULT_BENCHMARKS)))
+    parser.add_option('-l', '--layout', dest='layout', default='bigMaze',
+                      help='Layout name or .lay file to run on [Default: %default]')
+    parser.add_option('--foodLayouts', dest='foodLayouts',
+                      default='testSearch,tinySearch,smallSearch,trickySearch',
+                      help='Comma separated layouts for the food benchmark [Default: %default]')
+    parser.add_option('--json', dest='json', action='store_true', default=False,
+                      help='Print the results as one JSON object')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    known = dict(BENCHMARKS)
+    for name in options.benchmarks or []:
+        if name not in known:
+            raise Exception('Unknown benchmark: ' + name)
+    return options
+
+
+def runBenchmarks(options):
+    lay = layout.getLayout(options.layout)
+    if lay == None:
+        raise Exception('The layout ' + options.layout + ' cannot be found')
+    selected = options.benchmarks or DEFAULT_BENCHMARKS
+    results = {}
+    for name, fn in BENCHMARKS:
+        if name in selected:
+            results[name] = fn(lay, options)
+    return results
+
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    results = runBenchmarks(options)
+    if options.json:
+        import json
+        print(json.dumps(results, sort_keys=True))
+    else:
+        for name, figures in results.items():
+            print(name)
+            for key in sorted(figures):
+                print('  %-36s %s' % (key, figures[key]))
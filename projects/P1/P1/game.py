@@ -252,11 +252,158 @@ class Grid:
                 bools.append(False)
         return bools
 
+class BitGrid:
+    """
+    A boolean Grid backed by a single arbitrary-precision int.  Cell (x,y)
+    is bit x * height + y, so copy() is O(1), count() is a popcount and the
+    hash is just the int.  Data is accessed via grid[x][y] exactly as with
+    Grid; grid[x] returns a lightweight view of column x.
+    """
+
+    CELLS_PER_INT = 30
+
+    def __init__(self, width, height, initialValue=False, bitRepresentation=None):
+        if initialValue not in [False, True]:
+            raise Exception('Grids can only contain booleans')
+        self.width = width
+        self.height = height
+        self.bits = self._mask() if initialValue else 0
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+
+    def _mask(self):
+        return (1 << (self.width * self.height)) - 1
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.width
+        if x < 0 or x >= self.width:
+            raise IndexError('grid index out of range')
+        return BitGridColumn(self, x)
+
+    def __setitem__(self, x, column):
+        view = self[x]
+        for y, value in enumerate(column):
+            view[y] = value
+
+    @property
+    def data(self):
+        """
+        A list of lists snapshot of the grid, for code written against Grid.
+        """
+        return [[self[x][y] for y in range(self.height)] for x in range(self.width)]
+
+    def __str__(self):
+        out = [[str(self[x][y])[0] for x in range(self.width)]
+               for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __eq__(self, other):
+        if other == None:
+            return False
+        if isinstance(other, BitGrid):
+            return (self.bits == other.bits and self.width == other.width
+                    and self.height == other.height)
+        return self.data == other.data
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def copy(self):
+        g = BitGrid(self.width, self.height)
+        g.bits = self.bits
+        return g
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        # The int is immutable, so sharing it is the same as copying it
+        return self.copy()
+
+    def count(self, item=True):
+        n = bin(self.bits).count('1')
+        if item:
+            return n
+        return self.width * self.height - n
+
+    def asList(self, key=True):
+        bits = self.bits if key else ~self.bits & self._mask()
+        height = self.height
+        list = []
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            list.append((index // height, index % height))
+            bits ^= low
+        return list
+
+    def packBits(self):
+        """
+        Returns the same (width, height, bitPackedInts...) tuple as
+        Grid.packBits, sliced straight out of the backing int.
+        """
+        packed = [self.width, self.height]
+        chunkMask = (1 << self.CELLS_PER_INT) - 1
+        fmt = '0%db' % self.CELLS_PER_INT
+        for i in range(self.width * self.height // self.CELLS_PER_INT + 1):
+            chunk = (self.bits >> (i * self.CELLS_PER_INT)) & chunkMask
+            # Grid packs the first cell of each chunk into the highest bit
+            packed.append(int(format(chunk, fmt)[::-1], 2))
+        return tuple(packed)
+
+    def _unpackBits(self, bits):
+        """
+        Fills in data from a bit-level representation
+        """
+        fmt = '0%db' % self.CELLS_PER_INT
+        value = 0
+        for i, packed in enumerate(bits):
+            if packed < 0:
+                raise ValueError("must be a positive integer")
+            chunk = int(format(packed, fmt)[-self.CELLS_PER_INT:][::-1], 2)
+            value |= chunk << (i * self.CELLS_PER_INT)
+        self.bits = value & self._mask()
+
+
+class BitGridColumn:
+    """
+    A view of one column of a BitGrid, so that grid[x][y] reads and writes
+    the bits of the underlying grid.
+    """
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def _bit(self, y):
+        height = self.grid.height
+        if y < 0:
+            y += height
+        if y < 0 or y >= height:
+            raise IndexError('grid index out of range')
+        return 1 << (self.x * height + y)
+
+    def __getitem__(self, y):
+        return self.grid.bits & self._bit(y) != 0
+
+    def __setitem__(self, y, value):
+        if value:
+            self.grid.bits |= self._bit(y)
+        else:
+            self.grid.bits &= ~self._bit(y)
+
+    def __len__(self):
+        return self.grid.height
+
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1,2)):
         return bitRep
     width, height = bitRep[:2]
-    return Grid(width, height, bitRepresentation= bitRep[2:])
+    return BitGrid(width, height, bitRepresentation= bitRep[2:])
 
 ####################################
 # Parts you shouldn't have to read #
@@ -1,5 +1,8 @@
 from util import manhattanDistance
 from game import Grid
+from game import Actions
+from game import BitGrid
+import mazeDistances
 import os
 import random
 from functools import reduce
@@ -15,13 +18,17 @@ class Layout:
         self.width = len(layoutText[0])
         self.height= len(layoutText)
         self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        self.food = BitGrid(self.width, self.height, False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
         self.processLayoutText(layoutText)
+        self.legalActions = {}
+        self.legalNeighbors = {}
+        self.computeMoveTables()
         self.layoutText = layoutText
-        self.totalFood = len(self.food.asList())
+        self.totalFood = self.food.count()
+        self.mazeDistances = None
         # self.initializeVisibilityMatrix()
 
     def getNumGhosts(self):
@@ -48,6 +55,16 @@ class Layout:
         else:
             self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
 
+    def getMazeDistances(self):
+        """
+        Returns the MazeDistances of the walls (see mazeDistances.py), the
+        all-pairs distance table, built on first use.
+        """
+        if self.mazeDistances == None:
+            self.mazeDistances = mazeDistances.getMazeDistances(
+                self.walls, self.layoutText)
+        return self.mazeDistances
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]
@@ -77,7 +94,9 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        # Layouts are never changed after they are built, so every copy can
+        # share this one and its move tables
+        return self
 
     def processLayoutText(self, layoutText):
         """
@@ -100,6 +119,29 @@ class Layout:
         self.agentPositions.sort()
         self.agentPositions = [ ( i == 0, pos) for i, pos in self.agentPositions]
 
+    def computeMoveTables(self):
+        """
+        Precomputes, for every open cell, the legal actions there (in the
+        order Actions.getPossibleActions gives them, Stop included) and the
+        cell each action leads to, so legalNeighbors[cell][i] is where
+        legalActions[cell][i] goes.  Only integer cells are tabled; agents
+        between cells fall back to Actions.getPossibleActions.
+        """
+        for x in range(self.width):
+            for y in range(self.height):
+                if self.walls[x][y]:
+                    continue
+                actions, neighbors = [], []
+                for action, (dx, dy) in Actions._directionsAsList:
+                    nextx, nexty = x + dx, y + dy
+                    if nextx < 0 or nextx == self.width or nexty < 0 or nexty == self.height:
+                        continue
+                    if not self.walls[nextx][nexty]:
+                        actions.append(action)
+                        neighbors.append((nextx, nexty))
+                self.legalActions[(x, y)] = tuple(actions)
+                self.legalNeighbors[(x, y)] = tuple(neighbors)
+
     def processLayoutChar(self, x, y, layoutChar):
         if layoutChar == '%':
             self.walls[x][y] = True
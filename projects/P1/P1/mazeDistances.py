@@ -0,0 +1,245 @@
+# mazeDistances.py
+# ----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+All-pairs maze distances of a walls grid, for O(1) lookups.
+
+Every open cell gets an id, and a breadth first search from each one fills
+a row of a table of int16 distances, -1 where a cell cannot be reached.
+
+  distances = getMazeDistances(walls)
+  distances.distance((1, 1), (5, 3))
+  distances.distancesFrom((1, 1), foodGrid.asList())   # one to many
+
+The table is a NumPy array when NumPy is installed, so distancesFrom returns
+an array, and a flat array.array of the same values (distancesFrom returns a
+list) when it is not.  Tables are kept per walls grid, keyed by a hash of the
+walls, and if CACHE_DIRECTORY is set (pacman.py --distanceCache) they are
+also saved there and loaded again by later runs; the disk cache needs NumPy.
+Layouts also look their table up by layout text, which is far cheaper to key
+on than the walls, so the walls of each layout are hashed once per run.
+"""
+
+import array
+import hashlib
+import os
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CACHE_DIRECTORY = None
+MAZE_DISTANCES_CACHE = {}
+MAZE_DISTANCES_BY_TEXT = {}
+
+
+class MazeDistances:
+    """
+    The maze distances between every pair of open cells of a walls grid.
+
+      cells     the open cells, in id order
+      cellIds   cellIds[cell] is the id of an open cell
+      table     distances by id, table[i, j] (NumPy) or table[i * n + j]
+    """
+
+    def __init__(self, walls, table=None):
+        self.cells = walls.asList(False)
+        self.cellIds = dict([(cell, i) for i, cell in enumerate(self.cells)])
+        if table is None:
+            table = self.computeTable(walls)
+        self.table = table
+
+    def computeTable(self, walls):
+        n = len(self.cells)
+        neighbors = []
+        for x, y in self.cells:
+            ids = []
+            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+                nextId = self.cellIds.get((x + dx, y + dy))
+                if nextId != None:
+                    ids.append(nextId)
+            neighbors.append(ids)
+
+        if numpy != None:
+            table = numpy.full((n, n), -1, dtype=numpy.int16)
+        else:
+            table = array.array('h', [-1]) * (n * n)
+        for source in range(n):
+            row = [-1] * n
+            row[source] = 0
+            frontier = [source]
+            distance = 0
+            while frontier:
+                distance += 1
+                nextFrontier = []
+                for cellId in frontier:
+                    for nextId in neighbors[cellId]:
+                        if row[nextId] == -1:
+                            row[nextId] = distance
+                            nextFrontier.append(nextId)
+                frontier = nextFrontier
+            if numpy != None:
+                table[source] = row
+            else:
+                table[source * n:(source + 1) * n] = array.array('h', row)
+        return table
+
+    def getCellId(self, cell):
+        cellId = self.cellIds.get(cell)
+        if cellId == None:
+            raise Exception('%s is not an open cell' % str(cell))
+        return cellId
+
+    def distance(self, cell1, cell2):
+        """
+        Returns the maze distance between two open cells, or None if neither
+        can reach the other.
+        """
+        i = self.getCellId(cell1)
+        j = self.getCellId(cell2)
+        if numpy != None:
+            distance = int(self.table[i, j])
+        else:
+            distance = self.table[i * len(self.cells) + j]
+        if distance < 0:
+            return None
+        return distance
+
+    def distancesFrom(self, cell, cells):
+        """
+        Returns the maze distances from one open cell to each of cells, in
+        order, with -1 for those it cannot reach.
+        """
+        i = self.getCellId(cell)
+        ids = [self.getCellId(other) for other in cells]
+        if numpy != None:
+            return self.table[i, ids]
+        n = len(self.cells)
+        return [self.table[i * n + j] for j in ids]
+
+    def getReachableDistances(self, cell, cells):
+        """
+        Returns the maze distances from cell to those of cells it can reach,
+        raising an exception if it reaches none of them.
+        """
+        distances = self.distancesFrom(cell, cells)
+        if numpy != None:
+            distances = distances[distances >= 0]
+        else:
+            distances = [distance for distance in distances if distance >= 0]
+        if len(distances) == 0:
+            raise Exception('None of the cells can be reached from %s' % str(cell))
+        return distances
+
+    def getMaxDistance(self, cell, cells):
+        """
+        Returns the greatest maze distance from cell to any of cells it can
+        reach, or 0 when cells is empty.  Raises an exception if cell
+        reaches none of them.
+        """
+        if not cells:
+            return 0
+        return int(max(self.getReachableDistances(cell, cells)))
+
+    def getMinDistance(self, cell, cells):
+        """
+        Returns the least maze distance from cell to any of cells it can
+        reach, or 0 when cells is empty.  Raises an exception if cell
+        reaches none of them.
+        """
+        if not cells:
+            return 0
+        return int(min(self.getReachableDistances(cell, cells)))
+
+    def getSpanningTreeLength(self, cells):
+        """
+        Returns the total length of a minimum spanning tree over cells, with
+        maze distances as edge weights, by Prim's algorithm.  Raises an
+        exception unless the cells all reach each other.
+        """
+        if len(cells) < 2:
+            return 0
+        ids = [self.getCellId(cell) for cell in cells]
+        if numpy != None:
+            weights = self.table[numpy.ix_(ids, ids)].astype(numpy.int32)
+            if (weights < 0).any():
+                raise Exception('The cells do not all reach each other')
+            best = weights[0].copy()
+            inTree = numpy.zeros(len(ids), dtype=bool)
+            inTree[0] = True
+            total = 0
+            for step in range(len(ids) - 1):
+                best[inTree] = numpy.iinfo(numpy.int32).max
+                nearest = int(best.argmin())
+                total += int(best[nearest])
+                inTree[nearest] = True
+                best = numpy.minimum(best, weights[nearest])
+            return total
+        n = len(self.cells)
+        rest = ids[1:]
+        best = dict([(j, self.table[ids[0] * n + j]) for j in rest])
+        total = 0
+        while best:
+            nearest = min(best, key=best.get)
+            if best[nearest] < 0:
+                raise Exception('The cells do not all reach each other')
+            total += best.pop(nearest)
+            for j in best:
+                distance = self.table[nearest * n + j]
+                if distance < best[j]:
+                    best[j] = distance
+        return total
+
+
+def getWallsKey(walls):
+    """
+    A hash of the walls grid, the same from one run to the next.
+    """
+    text = '%d %d %s' % (walls.width, walls.height, str(walls.packBits()))
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def getMazeDistances(walls, layoutText=None):
+    """
+    Returns the MazeDistances of a walls grid, computed once per grid and
+    loaded from (or saved to) CACHE_DIRECTORY when it is set.  Given the
+    text of the layout the walls come from, a layout seen before skips
+    hashing the walls.
+    """
+    if layoutText != None:
+        text = '\n'.join(layoutText)
+        distances = MAZE_DISTANCES_BY_TEXT.get(text)
+        if distances == None:
+            distances = MAZE_DISTANCES_BY_TEXT[text] = getMazeDistances(walls)
+        return distances
+    key = getWallsKey(walls)
+    distances = MAZE_DISTANCES_CACHE.get(key)
+    if distances != None:
+        return distances
+    path = None
+    if CACHE_DIRECTORY != None and numpy != None:
+        path = os.path.join(CACHE_DIRECTORY, 'mazeDistances-%s.npy' % key)
+    if path != None and os.path.exists(path):
+        table = numpy.load(path)
+        if table.shape == (len(walls.asList(False)),) * 2:
+            distances = MazeDistances(walls, table)
+    if distances == None:
+        distances = MazeDistances(walls)
+        if path != None:
+            if not os.path.isdir(CACHE_DIRECTORY):
+                os.makedirs(CACHE_DIRECTORY)
+            numpy.save(path, distances.table)
+    MAZE_DISTANCES_CACHE[key] = distances
+    return distances
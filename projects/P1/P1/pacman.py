@@ -531,6 +531,8 @@ def readCommand(argv):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--distanceCache', dest='distanceCache',
+                      help=default('Directory to keep maze distance tables in between runs'), default=None)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -540,6 +542,10 @@ def readCommand(argv):
     # Fix the random seed
     if options.fixRandomSeed: random.seed('cs188')
 
+    if options.distanceCache:
+        import mazeDistances
+        mazeDistances.CACHE_DIRECTORY = options.distanceCache
+
     # Choose a layout
     args['layout'] = layout.getLayout(options.layout)
     if args['layout'] == None: raise Exception("The layout " + options.layout + " cannot be found")
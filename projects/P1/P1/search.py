@@ -89,60 +89,18 @@ def depthFirstSearch(problem):
     print("Is the start a goal?", problem.isGoalState(problem.getStartState()))
     print("Start's successors:", problem.getSuccessors(problem.getStartState()))
     """
-    closed = []
-    fringe = util.Stack()
-    ini_state = problem.getStartState()
-    fringe.push((ini_state, []))
-
-    while not fringe.isEmpty():
-        state, path = fringe.pop()
-        if problem.isGoalState(state):
-            return path
-        if state not in closed:
-            closed.append(state)
-            # For a given state, getSuccessors(state) should return a list of triples, (action, stepCost, successor),
-            #    where 'action' is the action required to get there
-            #          'stepCost' is the incremental cost of expanding to that successor
-            #          'successor' is a successor to the current state.
-            for childNode in problem.getSuccessors(state):
-                fringe.push((childNode[2], path + [childNode[0]]))
-    return []
+    return graphSearch(problem, util.Stack())
 
 
 def breadthFirstSearch(problem):
     """Search the shallowest nodes in the search tree first."""
-    closed = []
-    fringe = util.Queue()
-    fringe.push((problem.getStartState(), []))
-    while not fringe.isEmpty():
-        state, path = fringe.pop()  # pop the first item in the queue
-        if problem.isGoalState(state):
-            return path
-        if state not in closed:
-            closed.append(state)
-            for childNode in problem.getSuccessors(state):
-                fringe.push((childNode[2], path + [childNode[0]]))
-    return []
+    return graphSearch(problem, util.Queue())
 
 
 def uniformCostSearch(problem):
     """Search the node of least total cost first."""
-    closed = []
-    fringe = util.PriorityQueue()
-    fringe.push((problem.getStartState(), [], 0), 0)
-    #          ((state, path, cost of this step), priority)
-
-    while not fringe.isEmpty():
-        state, path, tot_cost = fringe.pop()
-        if problem.isGoalState(state):
-            return path
-        if state not in closed:
-            closed.append(state)
-            for childNode in problem.getSuccessors(state):
-                # (action, stepCost, successor)
-                fringe.update((childNode[2], path + [childNode[0]], tot_cost + childNode[1]), tot_cost + childNode[1])
-
-    return []
+    return graphSearch(problem, util.PriorityQueue(),
+                       lambda state, cost: cost)
 
 
 def nullHeuristic(state, problem=None):
@@ -155,21 +113,57 @@ def nullHeuristic(state, problem=None):
 
 def aStarSearch(problem, heuristic=nullHeuristic):
     """Search the node that has the lowest combined cost and heuristic first."""
-    closed = []
-    fringe = util.PriorityQueue()
-    ini_state = problem.getStartState()
-    fringe.push((ini_state, [], 0), heuristic(ini_state, problem))
+    return graphSearch(problem, util.PriorityQueue(),
+                       lambda state, cost: cost + heuristic(state, problem))
+
+
+def graphSearch(problem, fringe, priority=None):
+    """
+    The graph search the four algorithms above share; they differ only in
+    their fringe.  A Stack or Queue fringe is used as it is; a PriorityQueue
+    fringe takes each node with priority(state, costSoFar).
+
+    Goals are tested as nodes are popped, and a popped state that is
+    already closed is skipped.  The closed states are kept in a set, so
+    search states must be hashable.  A search node is the tuple
+    (state, action, cost, parent), where parent is the node it was reached
+    from, and the list of actions is only assembled, by following the
+    parents back from the goal, once a goal is found.
+    """
+    start = problem.getStartState()
+    node = (start, None, 0, None)
+    if priority == None:
+        push = fringe.push
+    else:
+        def push(node):
+            fringe.push(node, priority(node[0], node[2]))
+    push(node)
+    closed = set()
     while not fringe.isEmpty():
-        state, path, tot_cost = fringe.pop()
+        node = fringe.pop()
+        state, action, cost, parent = node
         if problem.isGoalState(state):
-            return path
-        if state not in closed:
-            closed.append(state)
-            for childNode in problem.getSuccessors(state):
-                fringe.update((childNode[2], path + [childNode[0]], tot_cost + childNode[1]),  tot_cost + childNode[1] + heuristic(childNode[2], problem))
+            return actionsTo(node)
+        if state in closed:
+            continue
+        closed.add(state)
+        for action, stepCost, successor in problem.getSuccessors(state):
+            push((successor, action, cost + stepCost, node))
     return []
 
 
+def actionsTo(node):
+    """
+    Returns the actions that lead from the start to a search node.
+    """
+    actions = []
+    while node[3] != None:
+        actions.append(node[1])
+        node = node[3]
+    actions.reverse()
+    return actions
+
+
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
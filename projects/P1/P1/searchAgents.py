@@ -37,7 +37,6 @@ Good luck and happy searching!
 from game import Directions
 from game import Agent
 from game import Actions
-import util
 import time
 import search
 
@@ -156,6 +155,8 @@ class PositionSearchProblem(search.SearchProblem):
         goal: A position in the gameState
         """
         self.walls = gameState.getWalls()
+        self.legalActions = gameState.data.layout.legalActions
+        self.legalNeighbors = gameState.data.layout.legalNeighbors
         self.startState = gameState.getPacmanPosition()
         if start != None: self.startState = start
         self.goal = goal
@@ -196,12 +197,9 @@ class PositionSearchProblem(search.SearchProblem):
         """
 
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x, y = state
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
+        # The layout's move tables list North, South, East, West, Stop in order
+        for action, nextState in zip(self.legalActions[state], self.legalNeighbors[state]):
+            if action != Directions.STOP:
                 cost = self.costFn(nextState)
                 successors.append((action, cost, nextState))
 
@@ -298,7 +296,27 @@ class CornersProblem(search.SearchProblem):
         # Please add any code here which you would like to use
         # in initializing the problem
         "*** YOUR CODE HERE ***"
-        self.startState = (self.startingPosition, [False, False, False, False])
+        # A state is (cellId, visited): the id of Pacman's cell in the maze
+        # distance table and a bitmask with bit i set once corner i is reached
+        self.distances = startingGameState.data.layout.getMazeDistances()
+        cellIds = self.distances.cellIds
+        self.cornerBits = {}
+        for index in self.corners:
+            self.cornerBits[cellIds[self.corners[index]]] = 1 << index
+        self.allCorners = (1 << len(self.corners)) - 1
+        # moves[cellId] lists (action, next cellId) for the legal moves
+        self.moves = []
+        for x, y in self.distances.cells:
+            moves = []
+            for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(action)
+                nextId = cellIds.get((int(x + dx), int(y + dy)))
+                if nextId != None:
+                    moves.append((action, nextId))
+            self.moves.append(moves)
+        start = cellIds[self.startingPosition]
+        self.startState = (start, self.cornerBits.get(start, 0))
+        self.heuristicInfo = {}
 
     def getStartState(self):
         """
@@ -313,7 +331,7 @@ class CornersProblem(search.SearchProblem):
         Returns whether this search state is a goal state of the problem.
         """
         "*** YOUR CODE HERE ***"
-        return state[1].count(False) == 0
+        return state[1] == self.allCorners
 
     def getSuccessors(self, state):
         """
@@ -327,27 +345,11 @@ class CornersProblem(search.SearchProblem):
             'successor' is a successor to the current state.
         """
 
+        "*** YOUR CODE HERE ***"
+        cellId, visited = state
         successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            # Add a successor state to the successor list if the action is legal
-            # Here's a code snippet for figuring out whether a new position hits a wall:
-            #   x,y = currentPosition
-            #   dx, dy = Actions.directionToVector(action)
-            #   next_x, next_y = int(x + dx), int(y + dy)
-            #   hitsWall = self.walls[next_x][next_y]
-
-            "*** YOUR CODE HERE ***"
-            x, y = state[0]
-            dx, dy = Actions.directionToVector(action)
-            next_x, next_y = int(x + dx), int(y + dy)
-            if not self.walls[next_x][next_y]:
-                next_Corners_status = state[1].copy()
-                if (next_x, next_y) in self.corners.values():
-                    for key, value in self.corners.items():
-                        if value == (next_x, next_y):
-                            index = key
-                    next_Corners_status[index] = True
-                successors.append((action, 1, ((next_x, next_y), next_Corners_status)))
+        for action, nextId in self.moves[cellId]:
+            successors.append((action, 1, (nextId, visited | self.cornerBits.get(nextId, 0))))
 
         self._expanded += 1  # DO NOT CHANGE
         # print("a successor is added")
@@ -380,24 +382,40 @@ def cornersHeuristic(state, problem):
     shortest path from the state to a goal of the problem; i.e.  it should be
     admissible (as well as consistent).
     """
-    corners = problem.corners  # These are the corner coordinates
-    walls = problem.walls  # These are the walls of the maze, as a Grid (game.py)
-    corner_status = state[1]
-    curr_position = state[0]
+    # The length of the shortest walk from Pacman through every corner not
+    # yet visited, in maze distance.  That is the true remaining cost, so the
+    # heuristic is consistent.  The walks between corners are worked out once
+    # per problem: tours[i][mask] is the shortest walk from corner i through
+    # the corners in mask.
     "*** YOUR CODE HERE ***"
-
-    if problem.isGoalState(state):
+    cellId, visited = state
+    remaining = problem.allCorners & ~visited
+    if remaining == 0:
         return 0
 
-    unVisited_Corners = []
-    for i in range(4):
-        if not corner_status[i]:
-            unVisited_Corners.append(corners[i])
-
-    manhattan_Distance = []
-    for uvc in unVisited_Corners:
-        manhattan_Distance.append(util.manhattanDistance(curr_position, uvc))
-    return max(manhattan_Distance)
+    info = problem.heuristicInfo
+    if 'tours' not in info:
+        distances = problem.distances
+        cornerCells = [problem.corners[i] for i in range(len(problem.corners))]
+        # fromCorner[i][cellId] is the maze distance from corner i to a cell
+        info['fromCorner'] = [[int(d) for d in distances.distancesFrom(corner, distances.cells)]
+                              for corner in cornerCells]
+        tours = [[0] * (problem.allCorners + 1) for corner in cornerCells]
+        for mask in range(1, problem.allCorners + 1):
+            for i in range(len(cornerCells)):
+                best = None
+                for j in range(len(cornerCells)):
+                    if mask & (1 << j):
+                        length = info['fromCorner'][i][distances.getCellId(cornerCells[j])] + \
+                                 tours[j][mask & ~(1 << j)]
+                        if best == None or length < best:
+                            best = length
+                tours[i][mask] = best
+        info['tours'] = tours
+
+    fromCorner, tours = info['fromCorner'], info['tours']
+    return min([fromCorner[i][cellId] + tours[i][remaining & ~(1 << i)]
+                for i in range(len(tours)) if remaining & (1 << i)])
 
 
 class AStarCornersAgent(SearchAgent):
@@ -501,13 +519,23 @@ def foodHeuristic(state, problem):
     "*** YOUR CODE HERE ***"
     if problem.isGoalState(state):
         return 0
+    # The walk to the nearest pellet plus a minimum spanning tree over all the
+    # pellets in maze distance.  Eating a pellet f shrinks the tree by at most
+    # the distance from f to the nearest pellet left, so this is consistent.
+    # The pellets and tree length depend only on the food, so they are kept
+    # in heuristicInfo by the food bitmask.
     position, foodGrid = state
-    distance = []
-    for food_position in foodGrid.asList():
-        searchProblem = PositionSearchProblem(problem.startingGameState, start=position, goal=food_position, warn=False,
-                                              visualize=False)
-        distance.append(len(search.ucs(searchProblem)))
-    return max(distance)
+    info = problem.heuristicInfo
+    if 'mazeDistances' not in info:
+        info['mazeDistances'] = problem.startingGameState.data.layout.getMazeDistances()
+        info['spanningTrees'] = {}
+    distances = info['mazeDistances']
+    key = foodGrid.bits
+    if key not in info['spanningTrees']:
+        foodList = foodGrid.asList()
+        info['spanningTrees'][key] = (foodList, distances.getSpanningTreeLength(foodList))
+    foodList, treeLength = info['spanningTrees'][key]
+    return distances.getMinDistance(position, foodList) + treeLength
 
 
 class ClosestDotSearchAgent(SearchAgent):
@@ -566,6 +594,8 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
         # Store info for the PositionSearchProblem (no need to change this)
         self.walls = gameState.getWalls()
+        self.legalActions = gameState.data.layout.legalActions
+        self.legalNeighbors = gameState.data.layout.legalNeighbors
         self.startState = gameState.getPacmanPosition()
         self.costFn = lambda x: 1
         self._visited, self._visitedlist, self._expanded = {}, [], 0  # DO NOT CHANGE
@@ -582,9 +612,11 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
 def mazeDistance(point1, point2, gameState):
     """
-    Returns the maze distance between any two points, using the search functions
-    you have already built. The gameState can be any game state -- Pacman's
-    position in that state is ignored.
+    Returns the maze distance between any two points, looked up in the
+    layout's all-pairs distance table (see mazeDistances.py), which is built
+    on the first call. The gameState can be any game state -- Pacman's
+    position in that state is ignored.  As with the breadth first search
+    this used to run, points that cannot reach each other give 0.
 
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
@@ -595,5 +627,7 @@ def mazeDistance(point1, point2, gameState):
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    distance = gameState.data.layout.getMazeDistances().distance(point1, point2)
+    if distance == None:
+        return 0
+    return distance
@@ -0,0 +1,331 @@
+# batchSimulator.py
+# -----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Plays many classic Pacman games at once, held as NumPy arrays.
+
+A BatchSimulator advances every unfinished game by one ply per step, with
+the same rules as pacman.GameState.generateSuccessor: eating food and
+capsules, scared timers and half speed, collisions, the time penalty, and
+the win and lose bonuses.  The ghosts behave like ghostAgents.RandomGhost or
+ghostAgents.DirectionalGhost.  Pacman's moves come from a policy callback
+that sees the whole batch and returns one action code per game.
+
+  import batchSimulator, layout
+  sim = batchSimulator.BatchSimulator(layout.getLayout('smallClassic'), 1000,
+                                      ghostType='directional', seed=1)
+  sim.run(batchSimulator.randomPolicy)
+  print(sim.scores.mean(), sim.wins.mean())
+
+Positions are kept in half squares so that scared ghosts, which move half a
+square per ply, stay on integers.  With recordActions=True each game's moves
+are kept, and checkAgainstEngine replays them through GameState to confirm
+that the two give the same outcome.
+
+Requires NumPy.
+"""
+
+import numpy as np
+
+from game import Directions
+from pacman import GameState
+from pacman import SCARED_TIME
+from pacman import TIME_PENALTY
+
+# Action codes; a policy returns one of these per game
+NORTH, SOUTH, EAST, WEST, STOP = range(5)
+ACTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST,
+           Directions.WEST, Directions.STOP]
+ACTION_CODES = dict([(action, code) for code, action in enumerate(ACTIONS)])
+# Unit moves and reverses, indexed by action code
+DX = np.array([0, 0, 1, -1, 0])
+DY = np.array([1, -1, 0, 0, 0])
+REVERSE = np.array([SOUTH, NORTH, WEST, EAST, STOP])
+
+# GhostRules.canKill allows 0.7 squares, which is 1.4 half squares; the
+# distance between two half-square positions is a whole number of them
+KILL_DISTANCE = 1
+
+
+class BatchSimulator:
+    """
+    numGames games on one layout, all started from its initial state.
+
+    The arrays below hold one row per game.  Positions are in half squares;
+    directions and actions are action codes.
+
+      x, y          (games, agents) positions
+      direction     (games, agents) the direction each agent last moved
+      scaredTimer   (games, agents) 0 for Pacman
+      food          (games, squares) food present, square x * height + y
+      capsules      (games, squares) capsules present
+      numFood       (games,) food left
+      scores        (games,)
+      wins, losses  (games,) whether each game has ended in that way
+      numPlies      (games,) plies played by each game
+    """
+
+    def __init__(self, layout, numGames, ghostType='random', numGhosts=None, seed=None,
+                 recordActions=False, probAttack=0.8, probScaredFlee=0.8):
+        if ghostType not in ['random', 'directional']:
+            raise Exception('Unknown ghost type ' + str(ghostType))
+        if numGhosts == None:
+            numGhosts = layout.getNumGhosts()
+        start = GameState()
+        start.initialize(layout, numGhosts)
+        self.layout = layout
+        self.numGames = numGames
+        self.numAgents = start.getNumAgents()
+        self.ghostType = ghostType
+        self.probAttack = probAttack
+        self.probScaredFlee = probScaredFlee
+        self.random = np.random.default_rng(seed)
+        self.height = layout.height
+
+        # legal[square, action]: the moves the layout allows from a square
+        numSquares = layout.width * layout.height
+        self.legal = np.zeros((numSquares, 5), dtype=bool)
+        for (x, y), actions in layout.legalActions.items():
+            for action in actions:
+                self.legal[x * self.height + y, ACTION_CODES[action]] = True
+
+        self.startX = np.array([2 * agentState.start.pos[0]
+                                for agentState in start.data.agentStates])
+        self.startY = np.array([2 * agentState.start.pos[1]
+                                for agentState in start.data.agentStates])
+        self.x = np.tile(self.startX, (numGames, 1))
+        self.y = np.tile(self.startY, (numGames, 1))
+        self.direction = np.full((numGames, self.numAgents), STOP)
+        self.scaredTimer = np.zeros((numGames, self.numAgents), dtype=int)
+        squares = np.zeros(numSquares, dtype=bool)
+        for x, y in layout.food.asList():
+            squares[x * self.height + y] = True
+        self.food = np.tile(squares, (numGames, 1))
+        squares = np.zeros(numSquares, dtype=bool)
+        for x, y in layout.capsules:
+            squares[x * self.height + y] = True
+        self.capsules = np.tile(squares, (numGames, 1))
+        self.numFood = np.full(numGames, layout.totalFood)
+        self.scores = np.zeros(numGames, dtype=int)
+        self.wins = np.zeros(numGames, dtype=bool)
+        self.losses = np.zeros(numGames, dtype=bool)
+        self.numPlies = np.zeros(numGames, dtype=int)
+        self.agentIndex = 0
+        self.actionLog = None
+        if recordActions:
+            self.actionLog = [[] for i in range(numGames)]
+
+    def getActiveGames(self):
+        "A boolean mask of the games still being played"
+        return ~(self.wins | self.losses)
+
+    def isOver(self):
+        return not self.getActiveGames().any()
+
+    def getSquares(self, agentIndex):
+        """
+        The square index of each game's agent, or -1 where it is between
+        squares.
+        """
+        x, y = self.x[:, agentIndex], self.y[:, agentIndex]
+        onGrid = (x % 2 == 0) & (y % 2 == 0)
+        return np.where(onGrid, (x // 2) * self.height + y // 2, -1)
+
+    def getLegalActionMask(self, agentIndex):
+        """
+        A (games, 5) boolean mask of the actions agentIndex may take in each
+        game, following PacmanRules and GhostRules.getLegalActions.
+        """
+        squares = self.getSquares(agentIndex)
+        onGrid = squares >= 0
+        mask = np.zeros((self.numGames, 5), dtype=bool)
+        mask[onGrid] = self.legal[squares[onGrid]]
+        # Between squares an agent can only keep going
+        offGrid = np.nonzero(~onGrid)[0]
+        mask[offGrid, self.direction[offGrid, agentIndex]] = True
+        if agentIndex > 0:
+            # Ghosts cannot stop, nor turn around unless they must
+            mask[:, STOP] = False
+            rows = np.arange(self.numGames)
+            reverse = REVERSE[self.direction[:, agentIndex]]
+            canTurn = mask.sum(axis=1) > 1
+            mask[rows[canTurn], reverse[canTurn]] = False
+        return mask
+
+    def step(self, pacmanPolicy):
+        """
+        Plays one ply, that of the next agent in turn, in every unfinished
+        game.  pacmanPolicy(simulator, legalMask) returns an array of action
+        codes, one per game; its choices for finished games are ignored.
+        """
+        agentIndex = self.agentIndex
+        active = self.getActiveGames()
+        legal = self.getLegalActionMask(agentIndex)
+        if agentIndex == 0:
+            actions = np.asarray(pacmanPolicy(self, legal))
+        else:
+            actions = self.chooseGhostActions(agentIndex, legal)
+        games = np.nonzero(active)[0]
+        actions = actions[games]
+        if not legal[games, actions].all():
+            raise Exception('Illegal action for agent %d' % agentIndex)
+
+        if self.actionLog != None:
+            for game, action in zip(games, actions):
+                self.actionLog[game].append((agentIndex, ACTIONS[action]))
+        if agentIndex == 0:
+            self.movePacman(games, actions)
+        else:
+            self.moveGhost(games, actions, agentIndex)
+        self.numPlies[games] += 1
+        self.agentIndex = (agentIndex + 1) % self.numAgents
+
+    def run(self, pacmanPolicy, maxPlies=None):
+        """
+        Steps until every game is over, or until maxPlies plies have been
+        played.  Returns the final scores.
+        """
+        plies = 0
+        while not self.isOver() and (maxPlies == None or plies < maxPlies):
+            self.step(pacmanPolicy)
+            plies += 1
+        return self.scores
+
+    def movePacman(self, games, actions):
+        scoreChange = np.zeros(len(games), dtype=int)
+        # Pacman is always on a square; he moves a whole square
+        self.x[games, 0] += 2 * DX[actions]
+        self.y[games, 0] += 2 * DY[actions]
+        moved = actions != STOP
+        self.direction[games[moved], 0] = actions[moved]
+
+        # Eat food, then capsules
+        squares = (self.x[games, 0] // 2) * self.height + self.y[games, 0] // 2
+        ate = self.food[games, squares]
+        self.food[games[ate], squares[ate]] = False
+        self.numFood[games] -= ate
+        scoreChange += 10 * ate
+        cleared = ate & (self.numFood[games] == 0)
+        scoreChange += 500 * cleared
+        self.wins[games[cleared]] = True
+        capsule = self.capsules[games, squares]
+        self.capsules[games[capsule], squares[capsule]] = False
+        self.scaredTimer[games[capsule], 1:] = SCARED_TIME
+
+        scoreChange -= TIME_PENALTY
+        for ghost in range(1, self.numAgents):
+            scoreChange += self.collide(games, ghost)
+        self.scores[games] += scoreChange
+
+    def moveGhost(self, games, actions, agentIndex):
+        scared = self.scaredTimer[games, agentIndex] > 0
+        step = np.where(scared, 1, 2)
+        self.x[games, agentIndex] += step * DX[actions]
+        self.y[games, agentIndex] += step * DY[actions]
+        self.direction[games, agentIndex] = actions
+
+        # Timers run down; a ghost that stops being scared between squares
+        # is snapped to the nearest one
+        timers = self.scaredTimer[games, agentIndex]
+        ending = games[timers == 1]
+        self.x[ending, agentIndex] += self.x[ending, agentIndex] % 2
+        self.y[ending, agentIndex] += self.y[ending, agentIndex] % 2
+        self.scaredTimer[games, agentIndex] = np.maximum(0, timers - 1)
+
+        self.scores[games] += self.collide(games, agentIndex)
+
+    def collide(self, games, ghost):
+        """
+        Resolves any collision between Pacman and ghost in games, as
+        GhostRules.checkDeath and collide do, and returns the score change.
+        """
+        distance = (np.abs(self.x[games, ghost] - self.x[games, 0]) +
+                    np.abs(self.y[games, ghost] - self.y[games, 0]))
+        touching = distance <= KILL_DISTANCE
+        scared = self.scaredTimer[games, ghost] > 0
+        eaten = games[touching & scared]
+        self.x[eaten, ghost] = self.startX[ghost]
+        self.y[eaten, ghost] = self.startY[ghost]
+        self.direction[eaten, ghost] = STOP
+        self.scaredTimer[eaten, ghost] = 0
+        killed = touching & ~scared & ~self.wins[games]
+        self.losses[games[killed]] = True
+        return 200 * (touching & scared) - 500 * killed
+
+    def chooseGhostActions(self, agentIndex, legal):
+        """
+        Samples an action for agentIndex in every game from the distribution
+        RandomGhost or DirectionalGhost would use.
+        """
+        weights = legal.astype(float)
+        if self.ghostType == 'directional':
+            scared = self.scaredTimer[:, agentIndex] > 0
+            step = np.where(scared, 1, 2)[:, None]
+            newX = self.x[:, agentIndex, None] + step * DX[None, :]
+            newY = self.y[:, agentIndex, None] + step * DY[None, :]
+            distance = (np.abs(newX - self.x[:, 0, None]) +
+                        np.abs(newY - self.y[:, 0, None])).astype(float)
+            # The best move runs away when scared and closes in otherwise
+            distance = np.where(scared[:, None], -distance, distance)
+            distance[~legal] = np.inf
+            best = legal & (distance == distance.min(axis=1)[:, None])
+            bestProb = np.where(scared, self.probScaredFlee, self.probAttack)
+            numBest = np.maximum(best.sum(axis=1), 1)
+            numLegal = np.maximum(legal.sum(axis=1), 1)
+            weights = (best * (bestProb / numBest)[:, None] +
+                       legal * ((1 - bestProb) / numLegal)[:, None])
+        totals = weights.sum(axis=1)
+        totals[totals == 0] = 1
+        cumulative = np.cumsum(weights / totals[:, None], axis=1)
+        draws = self.random.random(self.numGames)[:, None]
+        actions = (draws >= cumulative).sum(axis=1)
+        # Guard against rounding pushing a draw past the last legal action
+        lastLegal = 4 - np.argmax(legal[:, ::-1], axis=1)
+        return np.minimum(actions, lastLegal)
+
+
+def randomPolicy(simulator, legal):
+    """
+    A Pacman policy that picks uniformly among the legal actions.
+    """
+    weights = legal / np.maximum(legal.sum(axis=1), 1)[:, None]
+    cumulative = np.cumsum(weights, axis=1)
+    draws = simulator.random.random(simulator.numGames)[:, None]
+    actions = (draws >= cumulative).sum(axis=1)
+    lastLegal = 4 - np.argmax(legal[:, ::-1], axis=1)
+    return np.minimum(actions, lastLegal)
+
+
+def checkAgainstEngine(simulator):
+    """
+    Replays each game of a simulator built with recordActions=True through
+    GameState.generateSuccessor and returns the indices of the games whose
+    final score, outcome or agent positions differ.
+    """
+    mismatches = []
+    for game, actions in enumerate(simulator.actionLog):
+        state = GameState()
+        state.initialize(simulator.layout, simulator.numAgents - 1)
+        for agentIndex, action in actions:
+            state = state.generateSuccessor(agentIndex, action)
+        positions = [(simulator.x[game, i] / 2.0, simulator.y[game, i] / 2.0)
+                     for i in range(simulator.numAgents)]
+        enginePositions = [agentState.configuration.pos
+                           for agentState in state.data.agentStates]
+        if (state.getScore() != simulator.scores[game] or
+                state.isWin() != simulator.wins[game] or
+                state.isLose() != simulator.losses[game] or
+                positions != enginePositions):
+            mismatches.append(game)
+    return mismatches
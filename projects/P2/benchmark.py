@@ -0,0 +1,327 @@
+# benchmark.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Timing harness for the game engine.
+
+  python benchmark.py                 # run every benchmark
+  python benchmark.py -b gameLoop     # run one benchmark
+  python benchmark.py -b scaling --sizes 11,21,41,81 --report scaling.csv
+
+Every benchmark seeds the random module itself, so the work done (though of
+course not the time it takes) is the same from run to run.
+
+The scaling benchmark sweeps generated mazes (see mazeGenerator.py) over a
+range of sizes.  Besides the engine figures measured here, it runs the
+search benchmarks of the search project (../P1/P1) and the distance and
+particle filter benchmarks of the tracking project (../P5) on each maze, in
+their own processes, and merges everything into one report.
+
+The batch benchmark needs NumPy, for batchSimulator.py.
+"""
+
+import json
+import optparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import layout
+import mazeGenerator
+import pacman
+import pacmanAgents
+import ghostAgents
+import textDisplay
+
+
+def playGames(layoutName, numGames, catchExceptions, trusted, seed=0):
+    """
+    Plays numGames headless LeftTurnAgent games against random ghosts and
+    returns (total plies, seconds).
+    """
+    random.seed(seed)
+    lay = layout.getLayout(layoutName)
+    rules = pacman.ClassicGameRules()
+    plies = 0
+    startTime = time.time()
+    for i in range(numGames):
+        ghosts = [ghostAgents.RandomGhost(j + 1)
+                  for j in range(lay.getNumGhosts())]
+        game = rules.newGame(lay, pacmanAgents.LeftTurnAgent(), ghosts,
+                             textDisplay.NullGraphics(), True,
+                             catchExceptions, trusted)
+        game.run()
+        plies += len(game.moveHistory)
+    return plies, time.time() - startTime
+
+
+def benchmarkGameLoop(options):
+    """
+    Plies per second through Game.run with its per-move safeguards
+    (exception handling and move timers), without them, and on the trusted
+    fast path, which also skips muting and the per-move bookkeeping.
+    """
+    modes = [('guarded', True, False),
+             ('unguarded', False, False),
+             ('trusted', False, True)]
+    results = {}
+    for name, catchExceptions, trusted in modes:
+        plies, seconds = playGames(options.layout, options.numGames,
+                                   catchExceptions, trusted)
+        results[name] = plies / seconds
+        print('  %-10s %7d plies in %6.2fs  %9.0f plies/s' %
+              (name, plies, seconds, results[name]))
+    print('  trusted speedup: %.2fx over guarded, %.2fx over unguarded' %
+          (results['trusted'] / results['guarded'],
+           results['trusted'] / results['unguarded']))
+    return results
+
+
+def successorThroughput(lay, numCalls, seed=0):
+    """
+    Returns generateSuccessor calls per second over random playouts on lay
+    that expand every legal action of each state they pass through.
+    """
+    rng = random.Random(seed)
+    start = pacman.GameState()
+    start.initialize(lay, lay.getNumGhosts())
+    numAgents = start.getNumAgents()
+    state, agentIndex, calls = start, 0, 0
+    startTime = time.time()
+    while calls < numCalls:
+        if state.isWin() or state.isLose():
+            state, agentIndex = start, 0
+        successors = [state.generateSuccessor(agentIndex, action)
+                      for action in state.getLegalActions(agentIndex)]
+        calls += len(successors)
+        state = rng.choice(successors)
+        agentIndex = (agentIndex + 1) % numAgents
+    return calls / (time.time() - startTime)
+
+
+def benchmarkSuccessors(options):
+    """
+    generateSuccessor throughput on the chosen layout.
+    """
+    rate = successorThroughput(layout.getLayout(options.layout), 50000)
+    print('  %9.0f successors/s' % rate)
+    return {'successorsPerSecond': rate}
+
+
+def rollouts(lay, numRollouts, depth, useSimulation, seed=0):
+    """
+    Plays numRollouts random playouts of up to depth plies from the start of
+    lay, through generateSuccessor or through a Simulation that is restored
+    after each one, and returns the plies played per second.
+    """
+    rng = random.Random(seed)
+    start = pacman.GameState()
+    start.initialize(lay, lay.getNumGhosts())
+    numAgents = start.getNumAgents()
+    simulation = start.simulate()
+    root = simulation.snapshot()
+    plies = 0
+    startTime = time.time()
+    for i in range(numRollouts):
+        state = start
+        for ply in range(depth):
+            if useSimulation:
+                if simulation.isOver():
+                    break
+                agentIndex = ply % numAgents
+                simulation.apply(agentIndex, rng.choice(
+                    simulation.getLegalActions(agentIndex)))
+            else:
+                if state.isWin() or state.isLose():
+                    break
+                agentIndex = ply % numAgents
+                state = state.generateSuccessor(agentIndex, rng.choice(
+                    state.getLegalActions(agentIndex)))
+            plies += 1
+        simulation.restore(root)
+    return plies / (time.time() - startTime)
+
+
+def benchmarkRollouts(options):
+    """
+    Random playout throughput with fresh successor states and with a
+    Simulation's apply and restore.
+    """
+    lay = layout.getLayout(options.layout)
+    results = {}
+    for name, useSimulation in [('generateSuccessor', False),
+                                ('simulation', True)]:
+        results[name] = rollouts(lay, 20 * options.numGames, 200, useSimulation)
+        print('  %-18s %9.0f plies/s' % (name, results[name]))
+    print('  simulation speedup: %.2fx' %
+          (results['simulation'] / results['generateSuccessor']))
+    return results
+
+
+def benchmarkBatch(options):
+    """
+    Plies per second for random Pacman games against directional ghosts,
+    played together by batchSimulator and then replayed one at a time
+    through GameState, which also checks that the two agree.
+    """
+    import batchSimulator
+    lay = layout.getLayout(options.layout)
+    simulator = batchSimulator.BatchSimulator(
+        lay, 50 * options.numGames, ghostType='directional', seed=0,
+        recordActions=True)
+    startTime = time.time()
+    simulator.run(batchSimulator.randomPolicy)
+    batchRate = simulator.numPlies.sum() / (time.time() - startTime)
+    startTime = time.time()
+    mismatches = batchSimulator.checkAgainstEngine(simulator)
+    scalarRate = simulator.numPlies.sum() / (time.time() - startTime)
+    if mismatches:
+        raise Exception('%d batch games disagree with GameState' %
+                        len(mismatches))
+    print('  %d games  batch %9.0f plies/s  scalar %9.0f plies/s  (%.1fx)' %
+          (simulator.numGames, batchRate, scalarRate, batchRate / scalarRate))
+    return {'batchPliesPerSecond': batchRate,
+            'scalarPliesPerSecond': scalarRate}
+
+
+# The sibling projects whose benchmark.py the scaling benchmark runs
+SIBLING_PROJECTS = [('search', os.path.join('..', 'P1', 'P1')),
+                    ('tracking', os.path.join('..', 'P5'))]
+
+
+def runSiblingBenchmark(directory, layoutPath):
+    """
+    Runs the benchmark.py of another project on layoutPath and returns its
+    results, flattened to a dict of 'benchmark.figure' keys.
+    """
+    output = subprocess.check_output(
+        [sys.executable, 'benchmark.py', '--json', '-l', layoutPath],
+        cwd=directory, stderr=subprocess.DEVNULL)
+    flattened = {}
+    for benchmark, figures in json.loads(output.decode()).items():
+        for figure, value in figures.items():
+            flattened[benchmark + '.' + figure] = value
+    return flattened
+
+
+def benchmarkScaling(options):
+    """
+    Engine, search and inference timings over generated square mazes of each
+    of the sizes in options.sizes.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    siblings = []
+    for name, relative in SIBLING_PROJECTS:
+        directory = os.path.normpath(os.path.join(here, relative))
+        if os.path.exists(os.path.join(directory, 'benchmark.py')):
+            siblings.append((name, directory))
+        else:
+            print('  skipping the %s project: %s not found' % (name, directory))
+
+    rows = []
+    tempDir = tempfile.mkdtemp()
+    try:
+        for size in [int(size) for size in options.sizes.split(',')]:
+            mazeRows = mazeGenerator.generateMaze(size, size, seed=size)
+            path = os.path.join(tempDir, 'maze%d.lay' % size)
+            mazeGenerator.writeMaze(path, mazeRows)
+            lay = layout.internLayout(mazeRows)
+            graph = lay.getCorridorGraph()
+            row = {'size': size,
+                   'openSquares': len(lay.walls.asList(False)),
+                   'corridorNodes': len(graph.nodes),
+                   'corridors': len(graph.corridors),
+                   'engine.successorsPerSecond': successorThroughput(lay, 20000)}
+            for name, directory in siblings:
+                row.update(runSiblingBenchmark(directory, path))
+            print('  %s' % ', '.join(['%s=%.4g' % (key, row[key])
+                                      for key in sorted(row)]))
+            rows.append(row)
+    finally:
+        for fileName in os.listdir(tempDir):
+            os.remove(os.path.join(tempDir, fileName))
+        os.rmdir(tempDir)
+
+    if options.report:
+        writeReport(options.report, rows)
+        print('  report written to %s' % options.report)
+    return rows
+
+
+def writeReport(path, rows):
+    """
+    Writes rows (dicts) to path as CSV if it ends in .csv, else as JSON.
+    """
+    f = open(path, 'w')
+    try:
+        if path.endswith('.csv'):
+            import csv
+            columns = sorted(set([key for row in rows for key in row]))
+            writer = csv.DictWriter(f, columns)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(rows, f, indent=2, sort_keys=True)
+    finally:
+        f.close()
+
+
+BENCHMARKS = [
+    ('gameLoop', benchmarkGameLoop),
+    ('successors', benchmarkSuccessors),
+    ('rollouts', benchmarkRollouts),
+    ('batch', benchmarkBatch),
+    ('scaling', benchmarkScaling),
+]
+
+
+def readCommand(argv):
+    parser = optparse.OptionParser(
+        usage='python benchmark.py [options]')
+    parser.add_option('-b', '--benchmark', dest='benchmarks', action='append',
+                      help='Benchmark to run (may be repeated): %s' %
+                      ', '.join([name for name, fn in BENCHMARKS]))
+    parser.add_option('-l', '--layout', dest='layout', default='mediumClassic',
+                      help='Layout used by game benchmarks [Default: %default]')
+    parser.add_option('-n', '--numGames', dest='numGames', type='int', default=20,
+                      help='Games played per configuration [Default: %default]')
+    parser.add_option('--sizes', dest='sizes', default='11,21,41',
+                      help='Comma separated maze sizes for the scaling benchmark [Default: %default]')
+    parser.add_option('--report', dest='report', default=None,
+                      help='Write the scaling results to this .csv or .json file')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    known = dict(BENCHMARKS)
+    for name in options.benchmarks or []:
+        if name not in known:
+            raise Exception('Unknown benchmark: ' + name)
+    return options
+
+
+def runBenchmarks(options):
+    selected = options.benchmarks or [name for name, fn in BENCHMARKS]
+    results = {}
+    for name, fn in BENCHMARKS:
+        if name in selected:
+            print(name)
+            results[name] = fn(options)
+    return results
+
+
+if __name__ == '__main__':
+    runBenchmarks(readCommand(sys.argv[1:]))
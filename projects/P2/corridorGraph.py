@@ -0,0 +1,252 @@
+# corridorGraph.py
+# ----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+The maze of a layout contracted to a graph of corridors.
+
+Most open cells have exactly two open neighbours, so they only lead from one
+place to the next.  The other cells, junctions (three or four neighbours)
+and dead ends (one, or none), are the nodes of the graph, and each chain of
+two-neighbour cells between two nodes is an edge, a Corridor, weighted by
+its length.  A maze with no nodes at all, a single loop, gets one node
+chosen at its lowest cell.
+
+  graph = layout.getCorridorGraph()
+  corridor, offset = graph.locate((5, 3))
+  graph.getDistance((1, 1), (5, 3))           # the maze distance
+  corridor.countFood(gameState.getFood())
+
+Only the walls are used, so the graph of a layout never changes; layouts
+build it once, on first use.
+"""
+
+import heapq
+
+
+class Corridor:
+    """
+    The cells between two nodes, start and end (which are equal for a
+    loop).  cells lists the cells strictly between them in order from start,
+    so the corridor is length = len(cells) + 1 steps long and the cell at
+    offset i from start is getCell(i).  mask has the bits of the inner cells
+    set, numbered as in game.BitGrid (x * height + y).
+    """
+
+    def __init__(self, index, start, end, cells, height):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.cells = tuple(cells)
+        self.length = len(cells) + 1
+        mask = 0
+        for x, y in cells:
+            mask |= 1 << (x * height + y)
+        self.mask = mask
+
+    def getCell(self, offset):
+        if offset == 0:
+            return self.start
+        if offset == self.length:
+            return self.end
+        return self.cells[offset - 1]
+
+    def getOtherEnd(self, node):
+        if node == self.start:
+            return self.end
+        return self.start
+
+    def countFood(self, food):
+        """
+        The number of inner cells with food, given a food grid; a popcount
+        when the grid is a BitGrid.
+        """
+        if hasattr(food, 'bits'):
+            return bin(food.bits & self.mask).count('1')
+        return len([1 for x, y in self.cells if food[x][y]])
+
+    def getFood(self, food):
+        """
+        The inner cells with food, in order from start.
+        """
+        return [(x, y) for x, y in self.cells if food[x][y]]
+
+    def __repr__(self):
+        return 'Corridor(%s-%s, length %d)' % (self.start, self.end, self.length)
+
+
+class CorridorGraph:
+    """
+    The corridor graph of a walls grid.
+
+      nodes      the node cells
+      corridors  the Corridors; each appears once, whichever way it is read
+      edges      edges[node] lists (corridor, other node) for each corridor
+                 leaving node, a loop twice
+    """
+
+    def __init__(self, walls):
+        self.width = walls.width
+        self.height = walls.height
+        self.neighbors = {}
+        for x in range(self.width):
+            for y in range(self.height):
+                if walls[x][y]:
+                    continue
+                neighbors = []
+                for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
+                    nextx, nexty = x + dx, y + dy
+                    if 0 <= nextx < self.width and 0 <= nexty < self.height \
+                            and not walls[nextx][nexty]:
+                        neighbors.append((nextx, nexty))
+                self.neighbors[(x, y)] = neighbors
+
+        self.nodes = [cell for cell in sorted(self.neighbors)
+                      if len(self.neighbors[cell]) != 2]
+        self.isNodeCell = set(self.nodes)
+        self.corridors = []
+        self.edges = dict([(node, []) for node in self.nodes])
+        # The corridor and offset of every inner cell
+        self.places = {}
+        self.traceCorridors(self.nodes)
+        # Cells only reachable round a loop without nodes
+        for cell in sorted(self.neighbors):
+            if cell not in self.isNodeCell and cell not in self.places:
+                self.nodes.append(cell)
+                self.isNodeCell.add(cell)
+                self.edges[cell] = []
+                self.traceCorridors([cell])
+        self.nodeDistances = None
+
+    def traceCorridors(self, nodes):
+        """
+        Walks from each of nodes down each of its corridors not yet walked.
+        """
+        for node in nodes:
+            for first in self.neighbors[node]:
+                if first in self.places:
+                    continue
+                if first in self.isNodeCell and self.hasDirectCorridor(node, first):
+                    continue
+                cells = []
+                previous, cell = node, first
+                while cell not in self.isNodeCell:
+                    cells.append(cell)
+                    a, b = self.neighbors[cell]
+                    previous, cell = cell, b if a == previous else a
+                self.addCorridor(node, cell, cells)
+
+    def hasDirectCorridor(self, start, end):
+        """
+        Whether two neighbouring nodes are already joined.
+        """
+        for corridor, other in self.edges[start]:
+            if other == end and not corridor.cells:
+                return True
+        return False
+
+    def addCorridor(self, start, end, cells):
+        corridor = Corridor(len(self.corridors), start, end, cells, self.height)
+        self.corridors.append(corridor)
+        self.edges[start].append((corridor, end))
+        self.edges[end].append((corridor, start))
+        for offset, cell in enumerate(cells):
+            self.places[cell] = (corridor, offset + 1)
+
+    def isNode(self, cell):
+        return cell in self.isNodeCell
+
+    def locate(self, cell):
+        """
+        Returns (corridor, offset) for a cell inside a corridor, where offset
+        counts the steps from corridor.start.  A node is returned as the
+        first corridor leaving it, at offset 0 or corridor.length; a node
+        with no corridors gives (None, 0).
+        """
+        place = self.places.get(cell)
+        if place != None:
+            return place
+        if cell not in self.isNodeCell:
+            raise Exception('%s is not an open cell' % str(cell))
+        if not self.edges[cell]:
+            return (None, 0)
+        corridor, other = self.edges[cell][0]
+        if corridor.start == cell:
+            return (corridor, 0)
+        return (corridor, corridor.length)
+
+    def getExits(self, cell):
+        """
+        Returns the nodes a cell reaches without passing another node, as
+        (node, steps) pairs.
+        """
+        if cell in self.isNodeCell:
+            return [(cell, 0)]
+        corridor, offset = self.places[cell]
+        return [(corridor.start, offset), (corridor.end, corridor.length - offset)]
+
+    def getNodeDistances(self):
+        """
+        Returns a dictionary from each node to a dictionary of the maze
+        distances to the nodes it can reach, computed on first use by
+        Dijkstra's algorithm from every node.
+        """
+        if self.nodeDistances == None:
+            self.nodeDistances = dict([(node, self.shortestPaths(node))
+                                       for node in self.nodes])
+        return self.nodeDistances
+
+    def shortestPaths(self, source):
+        distances = {source: 0}
+        frontier = [(0, source)]
+        while frontier:
+            distance, node = heapq.heappop(frontier)
+            if distance > distances[node]:
+                continue
+            for corridor, other in self.edges[node]:
+                newDistance = distance + corridor.length
+                if newDistance < distances.get(other, newDistance + 1):
+                    distances[other] = newDistance
+                    heapq.heappush(frontier, (newDistance, other))
+        return distances
+
+    def getDistance(self, cell1, cell2):
+        """
+        Returns the maze distance between two open cells, or None if neither
+        can reach the other.
+        """
+        if cell1 == cell2:
+            return 0
+        best = None
+        place1 = self.places.get(cell1)
+        place2 = self.places.get(cell2)
+        if place1 != None and place2 != None and place1[0] is place2[0]:
+            best = abs(place1[1] - place2[1])
+        nodeDistances = self.getNodeDistances()
+        for node1, steps1 in self.getExits(cell1):
+            distances = nodeDistances[node1]
+            for node2, steps2 in self.getExits(cell2):
+                between = distances.get(node2)
+                if between == None:
+                    continue
+                distance = steps1 + between + steps2
+                if best == None or distance < best:
+                    best = distance
+        return best
+
+    def getNumCells(self):
+        return len(self.neighbors)
+
+    def __str__(self):
+        return '%d cells, %d nodes, %d corridors' % (
+            self.getNumCells(), len(self.nodes), len(self.corridors))
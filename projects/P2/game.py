@@ -21,6 +21,9 @@
 # For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
 
 from util import *
+import hashlib
+import random
+import struct
 import time
 import os
 import traceback
@@ -39,6 +42,13 @@ class Agent:
     def registerInitialState(self, state): # inspects the starting state
     """
 
+    # Set by Game while an instrumented game is running
+    instrumentation = None
+    # Game hands agents read-only views of the state (see GameStateView in
+    # pacman.py); an agent that changes the states it is given sets this to
+    # get a full copy instead
+    mutatesState = False
+
     def __init__(self, index=0):
         self.index = index
 
@@ -49,6 +59,16 @@ class Agent:
         """
         raiseNotDefined()
 
+    def reportSearch(self, nodesExpanded=0, depth=None):
+        """
+        Lets a searching agent report, from inside getAction, how many nodes
+        it expanded and how deep it searched.  Does nothing unless the game
+        is instrumented.
+        """
+        if self.instrumentation != None:
+            self.instrumentation.reportSearch(
+                self.index, nodesExpanded, depth)
+
 
 class Directions:
     NORTH = 'North'
@@ -169,6 +189,37 @@ class AgentState:
         return self.configuration.getDirection()
 
 
+class ReadOnlyConfiguration(Configuration):
+    """
+    A Configuration shared with the game that raises if it is changed.
+    generateSuccessor returns an ordinary Configuration.
+    """
+
+    def __init__(self, configuration):
+        self.__dict__.update(configuration.__dict__)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Observed configurations are read only; use generateSuccessor for a new one')
+
+
+class ReadOnlyAgentState(AgentState):
+    """
+    An AgentState shared with the game that raises if it, or its start or
+    current Configuration, is changed.  copy() returns an ordinary
+    AgentState, which keeps the read-only configurations.
+    """
+
+    def __init__(self, agentState):
+        fields = self.__dict__
+        fields.update(agentState.__dict__)
+        for name in ['start', 'configuration']:
+            if fields[name] != None:
+                fields[name] = ReadOnlyConfiguration(fields[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Observed agent states are read only; copy them to make changes')
+
+
 class Grid:
     """
     A 2-dimensional array of objects backed by a list of lists.  Data is accessed
@@ -262,7 +313,7 @@ class Grid:
         return tuple(bits)
 
     def _cellIndexToPosition(self, index):
-        x = index / self.height
+        x = index // self.height
         y = index % self.height
         return x, y
 
@@ -293,11 +344,218 @@ class Grid:
         return bools
 
 
+class BitGrid:
+    """
+    A boolean Grid backed by a single arbitrary-precision int.  Cell (x,y)
+    is bit x * height + y, so copy() is O(1), count() is a popcount and the
+    hash is just the int.  Data is accessed via grid[x][y] exactly as with
+    Grid; grid[x] returns a lightweight view of column x.
+    """
+
+    CELLS_PER_INT = 30
+
+    def __init__(self, width, height, initialValue=False, bitRepresentation=None):
+        if initialValue not in [False, True]:
+            raise Exception('Grids can only contain booleans')
+        self.width = width
+        self.height = height
+        self.bits = self._mask() if initialValue else 0
+        if bitRepresentation:
+            self._unpackBits(bitRepresentation)
+
+    def _mask(self):
+        return (1 << (self.width * self.height)) - 1
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.width
+        if x < 0 or x >= self.width:
+            raise IndexError('grid index out of range')
+        return BitGridColumn(self, x)
+
+    def __setitem__(self, x, column):
+        view = self[x]
+        for y, value in enumerate(column):
+            view[y] = value
+
+    @property
+    def data(self):
+        """
+        A list of lists snapshot of the grid, for code written against Grid.
+        """
+        return [[self[x][y] for y in range(self.height)] for x in range(self.width)]
+
+    def __str__(self):
+        out = [[str(self[x][y])[0] for x in range(self.width)]
+               for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __eq__(self, other):
+        if other == None:
+            return False
+        if isinstance(other, BitGrid):
+            return (self.bits == other.bits and self.width == other.width
+                    and self.height == other.height)
+        return self.data == other.data
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def copy(self):
+        g = BitGrid(self.width, self.height)
+        g.bits = self.bits
+        return g
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        # The int is immutable, so sharing it is the same as copying it
+        return self.copy()
+
+    def count(self, item=True):
+        n = bin(self.bits).count('1')
+        if item:
+            return n
+        return self.width * self.height - n
+
+    def asList(self, key=True):
+        bits = self.bits if key else ~self.bits & self._mask()
+        height = self.height
+        list = []
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            list.append((index // height, index % height))
+            bits ^= low
+        return list
+
+    def packBits(self):
+        """
+        Returns the same (width, height, bitPackedInts...) tuple as
+        Grid.packBits, sliced straight out of the backing int.
+        """
+        packed = [self.width, self.height]
+        chunkMask = (1 << self.CELLS_PER_INT) - 1
+        fmt = '0%db' % self.CELLS_PER_INT
+        for i in range(self.width * self.height // self.CELLS_PER_INT + 1):
+            chunk = (self.bits >> (i * self.CELLS_PER_INT)) & chunkMask
+            # Grid packs the first cell of each chunk into the highest bit
+            packed.append(int(format(chunk, fmt)[::-1], 2))
+        return tuple(packed)
+
+    def _unpackBits(self, bits):
+        """
+        Fills in data from a bit-level representation
+        """
+        fmt = '0%db' % self.CELLS_PER_INT
+        value = 0
+        for i, packed in enumerate(bits):
+            if packed < 0:
+                raise ValueError("must be a positive integer")
+            chunk = int(format(packed, fmt)[-self.CELLS_PER_INT:][::-1], 2)
+            value |= chunk << (i * self.CELLS_PER_INT)
+        self.bits = value & self._mask()
+
+
+class BitGridColumn:
+    """
+    A view of one column of a BitGrid, so that grid[x][y] reads and writes
+    the bits of the underlying grid.
+    """
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def _bit(self, y):
+        height = self.grid.height
+        if y < 0:
+            y += height
+        if y < 0 or y >= height:
+            raise IndexError('grid index out of range')
+        return 1 << (self.x * height + y)
+
+    def __getitem__(self, y):
+        return self.grid.bits & self._bit(y) != 0
+
+    def __setitem__(self, y, value):
+        if value:
+            self.grid.bits |= self._bit(y)
+        else:
+            self.grid.bits &= ~self._bit(y)
+
+    def __len__(self):
+        return self.grid.height
+
+
+class ReadOnlyBitGrid(BitGrid):
+    """
+    A BitGrid shared with the game that raises if it is changed.  copy()
+    returns an ordinary BitGrid.
+    """
+
+    def __init__(self, grid):
+        self.__dict__.update(grid.__dict__)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Observed grids are read only; copy them to make changes')
+
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1, 2)):
         return bitRep
     width, height = bitRep[:2]
-    return Grid(width, height, bitRepresentation=bitRep[2:])
+    return BitGrid(width, height, bitRepresentation=bitRep[2:])
+
+
+class ZobristTable:
+    """
+    Random 64-bit keys for the features of a game state on one layout: food
+    and capsules in each cell, and each agent's position, direction and
+    scared timer.  A state's hash is the XOR of the keys of its features, so
+    moving an agent or eating a pellet updates it with a couple of XORs.
+
+    Food and capsule keys are precomputed for every cell.  Agent keys are
+    made on first use, since ghosts can sit on half cells, and are derived
+    from the feature itself so every process agrees on them.
+    """
+
+    def __init__(self, width, height):
+        rng = random.Random('zobrist')
+        self.height = height
+        self.food = [rng.getrandbits(64) for i in range(width * height)]
+        self.capsules = [rng.getrandbits(64) for i in range(width * height)]
+        self.agentKeys = {}
+
+    def foodKey(self, position):
+        x, y = position
+        return self.food[x * self.height + y]
+
+    def capsuleKey(self, position):
+        x, y = position
+        return self.capsules[x * self.height + y]
+
+    def agentKey(self, agentIndex, agentState):
+        """
+        The combined key of an agent's configuration and scared timer.
+        """
+        return self.configurationKey(agentIndex, agentState.configuration,
+                                     agentState.scaredTimer)
+
+    def configurationKey(self, agentIndex, conf, scaredTimer):
+        if conf == None:
+            return 0
+        x, y = conf.pos
+        feature = (agentIndex, float(x), float(y), conf.direction, scaredTimer)
+        key = self.agentKeys.get(feature)
+        if key == None:
+            digest = hashlib.blake2b(
+                repr(feature).encode(), digest_size=8).digest()
+            key = self.agentKeys[feature] = int.from_bytes(digest, 'big')
+        return key
 
 ####################################
 # Parts you shouldn't have to read #
@@ -395,17 +653,39 @@ class Actions:
 
 class GameStateData:
 
+    # Formats used by pack: the fixed fields (score, win, lose, eaten agents
+    # as bits, agent count), then each agent (position, direction, scared
+    # timer), then the capsule count and each capsule; the food bits follow
+    _packedFixed = struct.Struct('<dBBIB')
+    _packedAgent = struct.Struct('<ddBH')
+    _packedCapsule = struct.Struct('<HH')
+    _packedDirections = [Directions.NORTH, Directions.SOUTH, Directions.EAST,
+                         Directions.WEST, Directions.STOP]
+    _directionCodes = dict([(direction, code)
+                            for code, direction in enumerate(_packedDirections)])
+
     def __init__(self, prevState=None):
         """
         Generates a new data packet by copying information from its predecessor.
+
+        The food grid, capsule list and agent states are shared with the
+        predecessor rather than copied.  Code that changes them must go through
+        the write barriers (getWritableAgentState, getWritableCapsules, or
+        replacing self.food with a modified copy), which clone the shared
+        object the first time it is written.
         """
+        self._ownedAgents = set()
+        self._ownsCapsules = False
+        self._zobrist = None
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates(prevState.agentStates)
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = list(prevState.agentStates)
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+            self._numFood = prevState._numFood
+            self._zobrist = prevState._zobrist
 
         self._foodEaten = None
         self._foodAdded = None
@@ -418,19 +698,106 @@ class GameStateData:
     def deepCopy(self):
         state = GameStateData(self)
         state.food = self.food.deepCopy()
-        state.layout = self.layout.deepCopy()
+        state.capsules = list(self.capsules)
+        state._ownsCapsules = True
+        state.agentStates = self.copyAgentStates(self.agentStates)
+        state._ownedAgents = set(range(len(state.agentStates)))
+        state.layout = self.layout
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
         state._foodAdded = self._foodAdded
         state._capsuleEaten = self._capsuleEaten
         return state
 
+    def pack(self):
+        """
+        Packs the parts of the state that change during play into a few
+        hundred bytes.  unpack rebuilds the state on the same layout; what
+        the last move changed (_agentMoved, _foodEaten and so on, which only
+        the displays use) is not kept.
+        """
+        eatenBits = 0
+        for agentIndex, eaten in enumerate(self._eaten):
+            if eaten:
+                eatenBits |= 1 << agentIndex
+        parts = [self._packedFixed.pack(self.score, self._win, self._lose,
+                                        eatenBits, len(self.agentStates))]
+        for agentState in self.agentStates:
+            x, y = agentState.configuration.pos
+            parts.append(self._packedAgent.pack(
+                x, y, self._directionCodes[agentState.configuration.direction],
+                agentState.scaredTimer))
+        parts.append(struct.pack('<H', len(self.capsules)))
+        for capsule in self.capsules:
+            parts.append(self._packedCapsule.pack(*capsule))
+        bits = self.food.bits
+        parts.append(bits.to_bytes((bits.bit_length() + 7) // 8, 'little'))
+        return b''.join(parts)
+
+    def unpack(layout, packed):
+        """
+        Rebuilds the GameStateData that pack turned into packed on layout.
+        """
+        data = GameStateData()
+        score, win, lose, eatenBits, numAgents = \
+            GameStateData._packedFixed.unpack_from(packed, 0)
+        data.initialize(layout, numAgents - 1)
+        offset = GameStateData._packedFixed.size
+        data.score = score
+        data._win = bool(win)
+        data._lose = bool(lose)
+        data._eaten = [bool(eatenBits >> i & 1) for i in range(numAgents)]
+        for agentState in data.agentStates:
+            x, y, direction, scaredTimer = GameStateData._packedAgent.unpack_from(
+                packed, offset)
+            offset += GameStateData._packedAgent.size
+            agentState.configuration = Configuration(
+                (x, y), GameStateData._packedDirections[direction])
+            agentState.scaredTimer = scaredTimer
+        numCapsules, = struct.unpack_from('<H', packed, offset)
+        offset += 2
+        capsules = []
+        for i in range(numCapsules):
+            capsules.append(
+                GameStateData._packedCapsule.unpack_from(packed, offset))
+            offset += GameStateData._packedCapsule.size
+        data.capsules = capsules
+        data.food.bits = int.from_bytes(packed[offset:], 'little')
+        data._numFood = data.food.count()
+        return data
+    unpack = staticmethod(unpack)
+
+    def __reduce__(self):
+        # Pickles as the shared layout (sent as its fingerprint and packed
+        # text) plus the packed state
+        return (GameStateData.unpack, (self.layout, self.pack()))
+
     def copyAgentStates(self, agentStates):
         copiedStates = []
         for agentState in agentStates:
             copiedStates.append(agentState.copy())
         return copiedStates
 
+    def getWritableAgentState(self, agentIndex):
+        """
+        Returns an AgentState for agentIndex that belongs to this state alone,
+        copying the one shared with the predecessor on first write.
+        """
+        if agentIndex not in self._ownedAgents:
+            self.agentStates[agentIndex] = self.agentStates[agentIndex].copy()
+            self._ownedAgents.add(agentIndex)
+        return self.agentStates[agentIndex]
+
+    def getWritableCapsules(self):
+        """
+        Returns a capsule list that belongs to this state alone, copying the
+        one shared with the predecessor on first write.
+        """
+        if not self._ownsCapsules:
+            self.capsules = list(self.capsules)
+            self._ownsCapsules = True
+        return self.capsules
+
     def __eq__(self, other):
         """
         Allows two states to be compared.
@@ -438,11 +805,11 @@ class GameStateData:
         if other == None:
             return False
         # TODO Check for type of other
-        if not self.agentStates == other.agentStates:
+        if not list(self.agentStates) == list(other.agentStates):
             return False
         if not self.food == other.food:
             return False
-        if not self.capsules == other.capsules:
+        if not list(self.capsules) == list(other.capsules):
             return False
         if not self.score == other.score:
             return False
@@ -452,13 +819,54 @@ class GameStateData:
         """
         Allows states to be keys of dictionaries.
         """
-        for i, state in enumerate(self.agentStates):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                # hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113 * hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575)
+        return hash((self.getZobristHash(), self.score))
+
+    def fingerprint(self):
+        """
+        Returns a full-width hash of the fields __eq__ compares, so distinct
+        states can be told apart by fingerprint alone.
+        """
+        # hash(-1) == hash(-2), so the score's sign is hashed separately
+        return hash((self.getZobristHash(), abs(self.score), self.score < 0))
+
+    def getZobristHash(self):
+        """
+        Returns the 64-bit Zobrist hash of the agents, food and capsules (see
+        ZobristTable).  It is carried from state to state by updateZobristHash;
+        code that edits a state some other way should call
+        invalidateZobristHash so it is recomputed here.
+        """
+        if self._zobrist == None:
+            table = self.layout.zobrist
+            h = 0
+            for index, agentState in enumerate(self.agentStates):
+                h ^= table.agentKey(index, agentState)
+            for position in self.food.asList():
+                h ^= table.foodKey(position)
+            for position in self.capsules:
+                h ^= table.capsuleKey(position)
+            self._zobrist = h
+        return self._zobrist
+
+    def updateZobristHash(self, prevState):
+        """
+        Brings the hash copied from prevState up to date after the rules have
+        moved agents (through getWritableAgentState) and eaten food or a
+        capsule.
+        """
+        table = self.layout.zobrist
+        h = prevState.getZobristHash()
+        for index in self._ownedAgents:
+            h ^= table.agentKey(index, prevState.agentStates[index])
+            h ^= table.agentKey(index, self.agentStates[index])
+        if self._foodEaten != None:
+            h ^= table.foodKey(self._foodEaten)
+        if self._capsuleEaten != None:
+            h ^= table.capsuleKey(self._capsuleEaten)
+        self._zobrist = h
+
+    def invalidateZobristHash(self):
+        self._zobrist = None
 
     def __str__(self):
         width, height = self.layout.width, self.layout.height
@@ -519,8 +927,10 @@ class GameStateData:
         Creates an initial game state from a layout array (see layout.py).
         """
         self.food = layout.food.copy()
+        self._numFood = layout.totalFood
         #self.capsules = []
-        self.capsules = layout.capsules[:]
+        self.capsules = list(layout.capsules)
+        self._ownsCapsules = True
         self.layout = layout
         self.score = 0
         self.scoreChange = 0
@@ -535,7 +945,66 @@ class GameStateData:
                     numGhosts += 1
             self.agentStates.append(AgentState(
                 Configuration(pos, Directions.STOP), isPacman))
+        self._ownedAgents = set(range(len(self.agentStates)))
         self._eaten = [False for a in self.agentStates]
+        self._zobrist = None
+
+
+class ReadOnlyAgentStates:
+    """
+    The agent states of a ReadOnlyGameStateData.  Each one is wrapped in a
+    ReadOnlyAgentState the first time it is looked up, so an agent that
+    only reads its own state never pays for the others.
+    """
+
+    def __init__(self, agentStates):
+        self._agentStates = agentStates
+        self._views = [None] * len(agentStates)
+
+    def __len__(self):
+        return len(self._agentStates)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple([self[i] for i in range(*index.indices(len(self)))])
+        view = self._views[index]
+        if view == None:
+            view = ReadOnlyAgentState(self._agentStates[index])
+            self._views[index] = view
+        return view
+
+    def __setitem__(self, index, value):
+        raise TypeError('Observed agent states are read only; copy them to make changes')
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class ReadOnlyGameStateData(GameStateData):
+    """
+    A view of a GameStateData that shares its food, capsules and agent states
+    and raises if any of them is changed.  Successors and deepCopy of a view
+    are ordinary, writable GameStateData.
+    """
+
+    def __init__(self, data):
+        data.getZobristHash()
+        fields = self.__dict__
+        fields.update(data.__dict__)
+        fields['food'] = ReadOnlyBitGrid(data.food)
+        fields['capsules'] = tuple(data.capsules)
+        fields['agentStates'] = ReadOnlyAgentStates(data.agentStates)
+        fields['_ownedAgents'] = frozenset()
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Observed states are read only; use deepCopy for a state you can change')
+
+    def getWritableAgentState(self, agentIndex):
+        raise AttributeError('Observed states are read only; use deepCopy for a state you can change')
+
+    def getWritableCapsules(self):
+        raise AttributeError('Observed states are read only; use deepCopy for a state you can change')
 
 
 try:
@@ -545,12 +1014,100 @@ except:
     _BOINC_ENABLED = False
 
 
+class GameInstrumentation:
+    """
+    Collects per-agent performance figures over one game: a histogram of
+    getAction latencies, the number of successors generated during each
+    getAction, the search effort agents report through Agent.reportSearch,
+    and the time spent updating the display.
+
+    countSuccessors, if given, returns a running count of successors
+    generated so far; the game rules supply it.  asDict gives everything as
+    plain data and writeJsonLine appends it to a file as one JSON object.
+    """
+
+    # Upper bounds, in seconds, of the latency histogram buckets; slower
+    # moves land in a final overflow bucket
+    LATENCY_BUCKETS = [0.0001, 0.0003, 0.001, 0.003,
+                       0.01, 0.03, 0.1, 0.3, 1.0, 3.0]
+
+    def __init__(self, numAgents, countSuccessors=None):
+        self.countSuccessors = countSuccessors
+        self.agents = [{'moves': 0, 'totalTime': 0.0, 'maxTime': 0.0,
+                        'latencyHistogram': [0] * (len(self.LATENCY_BUCKETS) + 1),
+                        'successors': 0, 'maxSuccessors': 0,
+                        'nodesExpanded': 0, 'maxDepth': None}
+                       for i in range(numAgents)]
+        self.displayUpdates = 0
+        self.displayTime = 0.0
+        self._moveStart = 0.0
+        self._successorsAtStart = 0
+
+    def startMove(self):
+        if self.countSuccessors != None:
+            self._successorsAtStart = self.countSuccessors()
+        self._moveStart = time.time()
+
+    def endMove(self, agentIndex):
+        elapsed = time.time() - self._moveStart
+        stats = self.agents[agentIndex]
+        stats['moves'] += 1
+        stats['totalTime'] += elapsed
+        stats['maxTime'] = max(stats['maxTime'], elapsed)
+        bucket = 0
+        for bound in self.LATENCY_BUCKETS:
+            if elapsed <= bound:
+                break
+            bucket += 1
+        stats['latencyHistogram'][bucket] += 1
+        if self.countSuccessors != None:
+            # The count can be reset under us (the autograder does this)
+            successors = max(
+                0, self.countSuccessors() - self._successorsAtStart)
+            stats['successors'] += successors
+            stats['maxSuccessors'] = max(stats['maxSuccessors'], successors)
+
+    def recordDisplay(self, elapsed):
+        self.displayUpdates += 1
+        self.displayTime += elapsed
+
+    def reportSearch(self, agentIndex, nodesExpanded=0, depth=None):
+        stats = self.agents[agentIndex]
+        stats['nodesExpanded'] += nodesExpanded
+        if depth != None and (stats['maxDepth'] == None or depth > stats['maxDepth']):
+            stats['maxDepth'] = depth
+
+    def asDict(self):
+        agents = []
+        for agentIndex, stats in enumerate(self.agents):
+            stats = dict(stats)
+            stats['index'] = agentIndex
+            stats['latencyHistogram'] = dict(
+                zip(['<=%g' % bound for bound in self.LATENCY_BUCKETS] +
+                    ['>%g' % self.LATENCY_BUCKETS[-1]],
+                    stats['latencyHistogram']))
+            agents.append(stats)
+        return {'agents': agents,
+                'display': {'updates': self.displayUpdates,
+                            'time': self.displayTime}}
+
+    def writeJsonLine(self, f, **extra):
+        """
+        Writes the figures, merged with any extra fields, as one line of
+        JSON to the open file f.
+        """
+        import json
+        record = dict(extra)
+        record.update(self.asDict())
+        f.write(json.dumps(record, sort_keys=True) + '\n')
+
+
 class Game:
     """
     The Game manages the control flow, soliciting actions from agents.
     """
 
-    def __init__(self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False):
+    def __init__(self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False, trusted=False, instrumentation=None, recorder=None):
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -559,7 +1116,18 @@ class Game:
         self.gameOver = False
         self.muteAgents = muteAgents
         self.catchExceptions = catchExceptions
+        # A trusted game runs its agents without muting or move timers, even
+        # when muteAgents is set; see runTrusted.  catchExceptions always
+        # keeps the timers, so it overrides trusted
+        self.trusted = trusted
+        self.instrumentation = instrumentation
+        # Streams each move to a game record as it is made, if set
+        self.recorder = recorder
         self.moveHistory = []
+        # Whether each agent is shown full copies of the state rather than
+        # read-only views; see getObservation
+        self.copiesState = [getattr(agent, 'mutatesState', False)
+                            for agent in agents]
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
         self.agentTimeout = False
@@ -572,6 +1140,16 @@ class Game:
         else:
             return self.rules.getProgress(self)
 
+    def getObservation(self, agentIndex):
+        """
+        Returns the current state as agentIndex gets to see it: a read-only
+        view sharing the game's state, or a full copy if the agent sets
+        mutatesState.
+        """
+        if self.copiesState[agentIndex]:
+            return self.state.deepCopy()
+        return self.state.getReadOnlyView()
+
     def _agentCrash(self, agentIndex, quiet=False):
         "Helper method for handling agent crashes"
         if not quiet:
@@ -607,6 +1185,9 @@ class Game:
         """
         self.display.initialize(self.state.data)
         self.numMoves = 0
+        for agent in self.agents:
+            if isinstance(agent, Agent):
+                agent.instrumentation = self.instrumentation
 
         # self.display.initialize(self.state.makeObservation(1).data)
         # inform learning agents of the game start
@@ -620,15 +1201,15 @@ class Game:
                 self.unmute()
                 self._agentCrash(i, quiet=True)
                 return
-            if ("registerInitialState" in dir(agent)):
+            if hasattr(agent, 'registerInitialState'):
                 self.mute(i)
                 if self.catchExceptions:
                     try:
                         timed_func = TimeoutFunction(
-                            agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
+                            agent.registerInitialState, self.rules.getMaxStartupTime(i))
                         try:
                             start_time = time.time()
-                            timed_func(self.state.deepCopy())
+                            timed_func(self.getObservation(i))
                             time_taken = time.time() - start_time
                             self.totalAgentTimes[i] += time_taken
                         except TimeoutFunctionException:
@@ -643,12 +1224,19 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    agent.registerInitialState(self.state.deepCopy())
+                    agent.registerInitialState(self.getObservation(i))
                 # TODO: could this exceed the total time
                 self.unmute()
 
+        if self.trusted and not self.catchExceptions:
+            self.runTrusted()
+            return
+
         agentIndex = self.startingIndex
         numAgents = len(self.agents)
+        # Resolve agent capabilities once rather than on every move
+        observes = [hasattr(agent, 'observationFunction')
+                    for agent in self.agents]
 
         while not self.gameOver:
             # Fetch the next agent
@@ -656,15 +1244,16 @@ class Game:
             move_time = 0
             skip_action = False
             # Generate an observation of the state
-            if 'observationFunction' in dir(agent):
+            if observes[agentIndex]:
                 self.mute(agentIndex)
                 if self.catchExceptions:
                     try:
-                        timed_func = TimeoutFunction(agent.observationFunction, int(
-                            self.rules.getMoveTimeout(agentIndex)))
+                        timed_func = TimeoutFunction(
+                            agent.observationFunction, self.rules.getMoveTimeout(agentIndex))
                         try:
                             start_time = time.time()
-                            observation = timed_func(self.state.deepCopy())
+                            observation = timed_func(
+                                self.getObservation(agentIndex))
                         except TimeoutFunctionException:
                             skip_action = True
                         move_time += time.time() - start_time
@@ -675,18 +1264,20 @@ class Game:
                         return
                 else:
                     observation = agent.observationFunction(
-                        self.state.deepCopy())
+                        self.getObservation(agentIndex))
                 self.unmute()
             else:
-                observation = self.state.deepCopy()
+                observation = self.getObservation(agentIndex)
 
             # Solicit an action
             action = None
             self.mute(agentIndex)
+            if self.instrumentation != None:
+                self.instrumentation.startMove()
             if self.catchExceptions:
                 try:
-                    timed_func = TimeoutFunction(agent.getAction, int(
-                        self.rules.getMoveTimeout(agentIndex)) - int(move_time))
+                    timed_func = TimeoutFunction(
+                        agent.getAction, self.rules.getMoveTimeout(agentIndex) - move_time)
                     try:
                         start_time = time.time()
                         if skip_action:
@@ -731,6 +1322,8 @@ class Game:
             else:
                 action = agent.getAction(observation)
             self.unmute()
+            if self.instrumentation != None:
+                self.instrumentation.endMove(agentIndex)
 
             # Execute the action
             self.moveHistory.append((agentIndex, action))
@@ -745,9 +1338,16 @@ class Game:
                     return
             else:
                 self.state = self.state.generateSuccessor(agentIndex, action)
+            if self.recorder != None:
+                self.recorder.recordMove(agentIndex, action, self.state)
 
             # Change the display
-            self.display.update(self.state.data)
+            if self.instrumentation != None:
+                start_time = time.time()
+                self.display.update(self.state.data)
+                self.instrumentation.recordDisplay(time.time() - start_time)
+            else:
+                self.display.update(self.state.data)
             ###idx = agentIndex - agentIndex % 2 + 1
             ###self.display.update( self.state.makeObservation(idx).data )
 
@@ -762,9 +1362,65 @@ class Game:
             if _BOINC_ENABLED:
                 boinc.set_fraction_done(self.getProgress())
 
-        # inform a learning agent of the game result
+        self.informFinal()
+
+    def runTrusted(self):
+        """
+        Plays out a started game without the per-move safeguards of run:
+        agents are neither muted nor timed, whatever muteAgents says, and
+        an exception an agent raises propagates out of run.  Agents see the same
+        views (or copies) as in run.  Meant for bulk headless games whose
+        agents are known to behave; run only takes it for a trusted game
+        without catchExceptions.
+        """
+        agents = self.agents
+        numAgents = len(agents)
+        display = self.display
+        rules = self.rules
+        moveHistory = self.moveHistory
+        observationFunctions = [getattr(agent, 'observationFunction', None)
+                                for agent in agents]
+        getActions = [agent.getAction for agent in agents]
+        instrumentation = self.instrumentation
+        recorder = self.recorder
+        agentIndex = self.startingIndex
+
+        while not self.gameOver:
+            observation = self.getObservation(agentIndex)
+            observe = observationFunctions[agentIndex]
+            if observe != None:
+                observation = observe(observation)
+            if instrumentation != None:
+                instrumentation.startMove()
+                action = getActions[agentIndex](observation)
+                instrumentation.endMove(agentIndex)
+            else:
+                action = getActions[agentIndex](observation)
+
+            moveHistory.append((agentIndex, action))
+            self.state = self.state.generateSuccessor(agentIndex, action)
+            if recorder != None:
+                recorder.recordMove(agentIndex, action, self.state)
+            if instrumentation != None:
+                startTime = time.time()
+                display.update(self.state.data)
+                instrumentation.recordDisplay(time.time() - startTime)
+            else:
+                display.update(self.state.data)
+            rules.process(self.state, self)
+            agentIndex = (agentIndex + 1) % numAgents
+
+            if _BOINC_ENABLED:
+                boinc.set_fraction_done(self.getProgress())
+
+        self.informFinal()
+
+    def informFinal(self):
+        """
+        Informs learning agents of the game result and closes the display.
+        """
         for agentIndex, agent in enumerate(self.agents):
-            if "final" in dir(agent):
+            if hasattr(agent, 'final'):
                 try:
                     self.mute(agentIndex)
                     agent.final(self.state)
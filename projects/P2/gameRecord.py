@@ -0,0 +1,223 @@
+# gameRecord.py
+# -------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+A compact binary format for recorded games.
+
+A record starts with a header naming the layout (a fingerprint of its text,
+followed by the compressed text itself so a record replays anywhere) and the
+number of agents.  Each move after that is a single byte holding the agent
+index and the action.  Every keyframeInterval plies the full game state is
+written as a keyframe, so a reader can jump to any ply by restoring the
+nearest earlier keyframe and simulating only the moves after it.
+
+The file is written incrementally by GameRecorder while the game is played;
+a record cut short by a crash is still readable up to its last whole move.
+
+  python gameRecord.py FILE...            # summarize recorded games
+  python gameRecord.py FILE --ply 120     # show the board after ply 120
+"""
+
+import struct
+import sys
+
+import layout
+from game import Directions
+from game import GameStateData
+from pacman import GameState
+
+MAGIC = b'PACREC\x01'
+HEADER = struct.Struct('<16sIHI')    # fingerprint, interval, agents, text size
+KEYFRAME_MARKER = 0xFF
+KEYFRAME_HEADER = struct.Struct('<II')    # ply, payload size
+
+# Action codes; a move byte is (agentIndex << 3) | code, so 0xFF never occurs
+ACTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST,
+           Directions.WEST, Directions.STOP]
+ACTION_CODES = dict([(action, code) for code, action in enumerate(ACTIONS)])
+MAX_AGENTS = 31
+
+
+def decodeKeyframe(lay, payload):
+    """
+    Rebuilds the GameState a keyframe (see GameStateData.pack) holds.
+    """
+    state = GameState()
+    state.data = GameStateData.unpack(lay, payload)
+    return state
+
+
+class GameRecorder:
+    """
+    Streams a game to path as it is played.  Game calls recordMove after
+    every move; call close when the game is over.
+    """
+
+    def __init__(self, path, lay, numAgents, keyframeInterval=100):
+        if numAgents > MAX_AGENTS:
+            raise Exception('Cannot record games with more than %d agents' %
+                            MAX_AGENTS)
+        self.path = path
+        self.keyframeInterval = keyframeInterval
+        self.numPlies = 0
+        text = lay.packedText
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.file.write(HEADER.pack(lay.fingerprint, keyframeInterval,
+                                    numAgents, len(text)))
+        self.file.write(text)
+
+    def recordMove(self, agentIndex, action, state):
+        """
+        Records that agentIndex took action, producing state.
+        """
+        self.file.write(bytes([agentIndex << 3 | ACTION_CODES[action]]))
+        self.numPlies += 1
+        if self.numPlies % self.keyframeInterval == 0:
+            payload = state.data.pack()
+            self.file.write(bytes([KEYFRAME_MARKER]))
+            self.file.write(KEYFRAME_HEADER.pack(self.numPlies, len(payload)))
+            self.file.write(payload)
+
+    def close(self):
+        self.file.close()
+
+
+class GameRecord:
+    """
+    A recorded game read back from disk: its layout, its moves as
+    (agentIndex, action) pairs, and its keyframes.
+    """
+
+    def __init__(self, lay, numAgents, moves, keyframes):
+        self.layout = lay
+        self.numAgents = numAgents
+        self.moves = moves
+        self.keyframes = keyframes
+
+    def getNumPlies(self):
+        return len(self.moves)
+
+    def getStartState(self):
+        state = GameState()
+        state.initialize(self.layout, self.numAgents - 1)
+        return state
+
+    def getState(self, ply):
+        """
+        Returns the state after the first ply moves, simulating forward from
+        the nearest keyframe at or before ply.
+        """
+        if ply < 0 or ply > len(self.moves):
+            raise IndexError('Ply %d is outside the game (0-%d)' %
+                             (ply, len(self.moves)))
+        start = 0
+        for keyframePly in self.keyframes:
+            if start < keyframePly <= ply:
+                start = keyframePly
+        if start == 0:
+            state = self.getStartState()
+        else:
+            state = decodeKeyframe(self.layout, self.keyframes[start])
+        for agentIndex, action in self.moves[start:ply]:
+            state = state.generateSuccessor(agentIndex, action)
+        return state
+
+    def getFinalState(self):
+        return self.getState(len(self.moves))
+
+
+def isGameRecord(path):
+    f = open(path, 'rb')
+    try:
+        return f.read(len(MAGIC)) == MAGIC
+    finally:
+        f.close()
+
+
+def readGameRecord(path):
+    f = open(path, 'rb')
+    try:
+        raw = f.read()
+    finally:
+        f.close()
+    if raw[:len(MAGIC)] != MAGIC:
+        raise Exception('%s is not a recorded game' % path)
+    offset = len(MAGIC)
+    fingerprint, interval, numAgents, textSize = HEADER.unpack_from(
+        raw, offset)
+    offset += HEADER.size
+    lay = layout.restoreLayout(fingerprint, raw[offset:offset + textSize])
+    offset += textSize
+
+    moves = []
+    keyframes = {}
+    end = len(raw)
+    while offset < end:
+        byte = raw[offset]
+        if byte == KEYFRAME_MARKER:
+            if offset + 1 + KEYFRAME_HEADER.size > end:
+                break
+            ply, size = KEYFRAME_HEADER.unpack_from(raw, offset + 1)
+            offset += 1 + KEYFRAME_HEADER.size
+            if offset + size > end:
+                break
+            keyframes[ply] = raw[offset:offset + size]
+            offset += size
+        else:
+            moves.append((byte >> 3, ACTIONS[byte & 7]))
+            offset += 1
+    return GameRecord(lay, numAgents, moves, keyframes)
+
+
+def summarizeRecords(paths):
+    """
+    Re-simulates each recorded game from its last keyframe and returns
+    (path, plies, score, win) for each.
+    """
+    summaries = []
+    for path in paths:
+        record = readGameRecord(path)
+        state = record.getFinalState()
+        summaries.append((path, record.getNumPlies(),
+                          state.getScore(), state.isWin()))
+    return summaries
+
+
+def readCommand(argv):
+    import optparse
+    parser = optparse.OptionParser(
+        usage='python gameRecord.py [options] RECORD...')
+    parser.add_option('--ply', dest='ply', type='int', default=None,
+                      help='Print the board of a single record after this ply')
+    options, paths = parser.parse_args(argv)
+    if len(paths) == 0:
+        parser.error('no recorded games given')
+    if options.ply != None and len(paths) != 1:
+        parser.error('--ply takes a single recorded game')
+    return options, paths
+
+
+if __name__ == '__main__':
+    options, paths = readCommand(sys.argv[1:])
+    if options.ply != None:
+        record = readGameRecord(paths[0])
+        state = record.getState(options.ply)
+        print('Ply %d of %d, score %d' %
+              (options.ply, record.getNumPlies(), state.getScore()))
+        print(state)
+    else:
+        for path, plies, score, win in summarizeRecords(paths):
+            print('%s: %d plies, score %d, %s' %
+                  (path, plies, score, ['Loss', 'Win'][int(win)]))
@@ -14,57 +14,121 @@
 
 from util import manhattanDistance
 from game import Grid
+from game import BitGrid
+from game import ZobristTable
+from game import Actions
+import hashlib
 import os
 import random
-from functools import reduce
+import zlib
 
 VISIBILITY_MATRIX_CACHE = {}
+CORRIDOR_GRAPH_CACHE = {}
+LAYOUT_CACHE = {}
+LAYOUTS_BY_FINGERPRINT = {}
 
 
 class Layout:
     """
     A Layout manages the static information about the game board.
+
+    Layouts are immutable once built, so a single Layout is shared by every
+    GameState copy and every game played on it.  Use internLayout to get the
+    shared instance for a given layout text.
     """
 
     def __init__(self, layoutText):
         self.width = len(layoutText[0])
         self.height = len(layoutText)
         self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        self.food = BitGrid(self.width, self.height, False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
         self.processLayoutText(layoutText)
-        self.layoutText = layoutText
-        self.totalFood = len(self.food.asList())
-        # self.initializeVisibilityMatrix()
+        self.legalActions = {}
+        self.legalNeighbors = {}
+        self.computeMoveTables()
+        self.capsules = tuple(self.capsules)
+        self.agentPositions = tuple(self.agentPositions)
+        self.layoutText = tuple(layoutText)
+        text = '\n'.join(self.layoutText).encode()
+        self.fingerprint = hashlib.blake2b(text, digest_size=16).digest()
+        self.packedText = zlib.compress(text)
+        self.totalFood = self.food.count()
+        self.zobrist = ZobristTable(self.width, self.height)
+        self.initializeVisibilityMatrix()
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError('Layouts are shared and cannot be modified')
+        self.__dict__[name] = value
+
+    def __reduce__(self):
+        # Unpickling rebinds to the receiving process's shared instance
+        return (restoreLayout, (self.fingerprint, self.packedText))
 
     def getNumGhosts(self):
         return self.numGhosts
 
     def initializeVisibilityMatrix(self):
-        global VISIBILITY_MATRIX_CACHE
-        if reduce(str.__add__, self.layoutText) not in VISIBILITY_MATRIX_CACHE:
-            from game import Directions
-            vecs = [(-0.5, 0), (0.5, 0), (0, -0.5), (0, 0.5)]
-            dirs = [Directions.NORTH, Directions.SOUTH,
-                    Directions.WEST, Directions.EAST]
-            vis = Grid(self.width, self.height, {Directions.NORTH: set(), Directions.SOUTH: set(
-            ), Directions.EAST: set(), Directions.WEST: set(), Directions.STOP: set()})
-            for x in range(self.width):
-                for y in range(self.height):
-                    if self.walls[x][y] == False:
-                        for vec, direction in zip(vecs, dirs):
-                            dx, dy = vec
-                            nextx, nexty = x + dx, y + dy
-                            while (nextx + nexty) != int(nextx) + int(nexty) or not self.walls[int(nextx)][int(nexty)]:
-                                vis[x][y][direction].add((nextx, nexty))
-                                nextx, nexty = x + dx, y + dy
-            self.visibility = vis
-            VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)] = vis
-        else:
-            self.visibility = VISIBILITY_MATRIX_CACHE[reduce(
-                str.__add__, self.layoutText)]
+        """
+        Fills in self.visibility, which maps each open cell to a dict from
+        the direction Pacman faces to the cells he can see: his own and those
+        straight ahead up to the next wall.  Those cells all lie in his column
+        (facing north or south, or stopped) or his row (facing east or west),
+        so each set is a bitset over that line alone: bit y of the column or
+        bit x of the row.  This keeps the bitsets small on large maps.
+        """
+        if self.fingerprint in VISIBILITY_MATRIX_CACHE:
+            self.visibility = VISIBILITY_MATRIX_CACHE[self.fingerprint]
+            return
+        from game import Directions
+        width, height, walls = self.width, self.height, self.walls
+        vis = {}
+        for x in range(width):
+            for y in range(height):
+                if not walls[x][y]:
+                    vis[(x, y)] = {Directions.STOP: 1 << y}
+        # Each sweep runs against the direction it fills in, so the cells seen
+        # from one cell are those seen from the next one plus itself
+        for x in range(width):
+            seen = 0
+            for y in range(height - 1, -1, -1):
+                seen = self._extendSight(vis, x, y, y, seen, Directions.NORTH)
+            seen = 0
+            for y in range(height):
+                seen = self._extendSight(vis, x, y, y, seen, Directions.SOUTH)
+        for y in range(height):
+            seen = 0
+            for x in range(width - 1, -1, -1):
+                seen = self._extendSight(vis, x, y, x, seen, Directions.EAST)
+            seen = 0
+            for x in range(width):
+                seen = self._extendSight(vis, x, y, x, seen, Directions.WEST)
+        self.visibility = vis
+        VISIBILITY_MATRIX_CACHE[self.fingerprint] = vis
+
+    def _extendSight(self, vis, x, y, bit, seen, direction):
+        if self.walls[x][y]:
+            return 0
+        seen |= 1 << bit
+        vis[(x, y)][direction] = seen
+        return seen
+
+    def getCorridorGraph(self):
+        """
+        Returns the CorridorGraph of the walls (see corridorGraph.py), built
+        on first use and shared by every layout with the same text.
+        """
+        graph = CORRIDOR_GRAPH_CACHE.get(self.fingerprint)
+        if graph == None:
+            # Only agents that plan over corridors need the module
+            from corridorGraph import CorridorGraph
+            graph = CorridorGraph(self.walls)
+            CORRIDOR_GRAPH_CACHE[self.fingerprint] = graph
+        return graph
 
     def isWall(self, pos):
         x, col = pos
@@ -90,14 +154,32 @@ class Layout:
         return pos
 
     def isVisibleFrom(self, ghostPos, pacPos, pacDirection):
-        row, col = [int(x) for x in pacPos]
-        return ghostPos in self.visibility[row][col][pacDirection]
+        from game import Directions
+        x, y = [int(coord + 0.5) for coord in pacPos]
+        seen = self.visibility[(x, y)][pacDirection]
+        # A ghost between two cells is visible if either cell is
+        gx, gy = ghostPos
+        cellsX = set([int(gx), int(gx + 0.5)])
+        cellsY = set([int(gy), int(gy + 0.5)])
+        if pacDirection in [Directions.EAST, Directions.WEST]:
+            if y not in cellsY:
+                return False
+            cells = cellsX
+        else:
+            if x not in cellsX:
+                return False
+            cells = cellsY
+        for cell in cells:
+            if seen >> cell & 1:
+                return True
+        return False
 
     def __str__(self):
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        # Layouts are immutable, so every copy can share this one
+        return self
 
     def processLayoutText(self, layoutText):
         """
@@ -120,6 +202,29 @@ class Layout:
         self.agentPositions.sort()
         self.agentPositions = [(i == 0, pos) for i, pos in self.agentPositions]
 
+    def computeMoveTables(self):
+        """
+        Precomputes, for every open cell, the legal actions there (in the
+        order Actions.getPossibleActions gives them, Stop included) and the
+        cell each action leads to, so legalNeighbors[cell][i] is where
+        legalActions[cell][i] goes.  Only integer cells are tabled; agents
+        between cells fall back to Actions.getPossibleActions.
+        """
+        for x in range(self.width):
+            for y in range(self.height):
+                if self.walls[x][y]:
+                    continue
+                actions, neighbors = [], []
+                for action, (dx, dy) in Actions._directionsAsList:
+                    nextx, nexty = x + dx, y + dy
+                    if nextx < 0 or nextx == self.width or nexty < 0 or nexty == self.height:
+                        continue
+                    if not self.walls[nextx][nexty]:
+                        actions.append(action)
+                        neighbors.append((nextx, nexty))
+                self.legalActions[(x, y)] = tuple(actions)
+                self.legalNeighbors[(x, y)] = tuple(neighbors)
+
     def processLayoutChar(self, x, y, layoutChar):
         if layoutChar == '%':
             self.walls[x][y] = True
@@ -137,28 +242,160 @@ class Layout:
             self.numGhosts += 1
 
 
+class LayoutRegistry:
+    """
+    Finds and loads layouts by name without changing the working directory.
+
+    A name is looked for as layouts/NAME.lay and NAME.lay in the working
+    directory and then in up to back+1 of its parents, as getLayout always
+    has.  Where a name resolved to is remembered, and each file is parsed
+    only once unless it changes on disk; files with the same text share one
+    Layout (see internLayout).
+
+    An index of parsed layouts can be written with saveIndex and read back
+    with loadIndex, which saves re-parsing them in a new process.  Entries
+    whose file has changed since the index was written are ignored.
+    """
+
+    def __init__(self):
+        self.paths = {}
+        self.loaded = {}
+
+    def getLayout(self, name, back=2):
+        key = (os.getcwd(), name, back)
+        path = self.paths.get(key)
+        if path == None or not os.path.exists(path):
+            path = self.findLayoutFile(name, back)
+            if path == None:
+                return None
+            self.paths[key] = path
+        return self.loadFile(path)
+
+    def findLayoutFile(self, name, back=2):
+        if name.endswith('.lay'):
+            fileName = name
+        else:
+            fileName = name + '.lay'
+        directory = os.getcwd()
+        for level in range(back + 2):
+            for candidate in [os.path.join(directory, 'layouts', fileName),
+                              os.path.join(directory, fileName)]:
+                if os.path.isfile(candidate):
+                    return candidate
+            directory = os.path.dirname(directory)
+        return None
+
+    def loadFile(self, path):
+        """
+        Returns the Layout in the file at path, parsing it only if it is new
+        or has changed since it was last loaded.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        entry = self.loaded.get(path)
+        if entry != None and entry[0] == signature:
+            return entry[1]
+        f = open(path)
+        try:
+            lay = internLayout([line.strip() for line in f])
+        finally:
+            f.close()
+        self.loaded[path] = (signature, lay)
+        return lay
+
+    def saveIndex(self, indexPath):
+        """
+        Writes every layout loaded so far, already parsed, to indexPath.
+        """
+        import pickle
+        entries = {}
+        for path, (signature, lay) in self.loaded.items():
+            # Bypass Layout.__reduce__, which sends only the text
+            entries[path] = (signature, dict(lay.__dict__))
+        f = open(indexPath, 'wb')
+        try:
+            pickle.dump(entries, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+
+    def loadIndex(self, indexPath):
+        """
+        Adds the layouts in an index written by saveIndex, skipping any whose
+        file is gone or has changed.  Returns the number of layouts added.
+        """
+        import pickle
+        f = open(indexPath, 'rb')
+        try:
+            entries = pickle.load(f)
+        finally:
+            f.close()
+        added = 0
+        for path, (signature, state) in entries.items():
+            if not os.path.exists(path):
+                continue
+            stat = os.stat(path)
+            if (stat.st_mtime_ns, stat.st_size) != signature:
+                continue
+            lay = LAYOUT_CACHE.get(state['layoutText'])
+            if lay == None:
+                lay = Layout.__new__(Layout)
+                lay.__dict__.update(state)
+                LAYOUT_CACHE[lay.layoutText] = lay
+                LAYOUTS_BY_FINGERPRINT[lay.fingerprint] = lay
+            self.loaded[path] = (signature, lay)
+            added += 1
+        return added
+
+
+REGISTRY = LayoutRegistry()
+
+
 def getLayout(name, back=2):
-    if name.endswith('.lay'):
-        layout = tryToLoad('layouts/' + name)
-        if layout == None:
-            layout = tryToLoad(name)
-    else:
-        layout = tryToLoad('layouts/' + name + '.lay')
-        if layout == None:
-            layout = tryToLoad(name + '.lay')
-    if layout == None and back >= 0:
-        curdir = os.path.abspath('.')
-        os.chdir('..')
-        layout = getLayout(name, back - 1)
-        os.chdir(curdir)
-    return layout
+    return REGISTRY.getLayout(name, back)
 
 
 def tryToLoad(fullname):
-    if(not os.path.exists(fullname)):
+    if(not os.path.isfile(fullname)):
         return None
-    f = open(fullname)
-    try:
-        return Layout([line.strip() for line in f])
-    finally:
-        f.close()
+    return REGISTRY.loadFile(fullname)
+
+
+def internLayout(layoutText):
+    """
+    Returns the shared Layout for layoutText, parsing it only the first time
+    that text is seen in this process.
+    """
+    key = tuple(layoutText)
+    if key not in LAYOUT_CACHE:
+        lay = Layout(key)
+        LAYOUT_CACHE[key] = lay
+        LAYOUTS_BY_FINGERPRINT[lay.fingerprint] = lay
+    return LAYOUT_CACHE[key]
+
+
+def restoreLayout(fingerprint, packedText):
+    """
+    Returns the shared Layout with the given fingerprint, unpacking its text
+    (a Layout's packedText) only if this process has not seen it yet.
+    """
+    lay = LAYOUTS_BY_FINGERPRINT.get(fingerprint)
+    if lay == None:
+        lay = internLayout(zlib.decompress(packedText).decode().split('\n'))
+        if lay.fingerprint != fingerprint:
+            raise Exception('Layout text does not match its fingerprint')
+    return lay
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 3:
+        print('USAGE: python layout.py INDEX_FILE LAYOUT_DIRECTORY...')
+        sys.exit(1)
+    for directory in sys.argv[2:]:
+        for fileName in sorted(os.listdir(directory)):
+            if fileName.endswith('.lay'):
+                REGISTRY.loadFile(os.path.abspath(
+                    os.path.join(directory, fileName)))
+    REGISTRY.saveIndex(sys.argv[1])
+    print('Indexed %d layouts in %s' % (len(REGISTRY.loaded), sys.argv[1]))
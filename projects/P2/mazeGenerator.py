@@ -0,0 +1,145 @@
+# mazeGenerator.py
+# ----------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Generates random mazes in the .lay format read by layout.py.
+
+  python mazeGenerator.py -W 41 -H 21 --seed 3 -o layouts/random41x21.lay
+
+A maze starts as a spanning tree of corridors carved by a randomized depth
+first search over the cells with odd coordinates, so every open square is
+reachable.  loopDensity is the chance that each remaining wall between two
+corridors is knocked through, which adds cycles.  Pacman, the ghosts and the
+capsules are placed on distinct open squares, and each other open square
+gets food with probability foodDensity.  Square (1, 1) is always open, and
+an even width or height leaves a double wall on the right or top.  The same
+arguments and seed always give the same maze.
+"""
+
+import random
+import sys
+
+
+def generateMaze(width, height, loopDensity=0.1, foodDensity=0.5, numCapsules=2, numGhosts=2, seed=None):
+    """
+    Returns the rows of a random maze, top row first, as layout.Layout takes
+    them.  width and height include the outer wall and must be at least 3.
+    """
+    if width < 3 or height < 3:
+        raise Exception('Mazes must be at least 3 by 3')
+    rng = random.Random(seed)
+    openSquares = set()
+
+    # Carve a spanning tree over the odd squares
+    start = (1, 1)
+    openSquares.add(start)
+    stack = [start]
+    while stack:
+        x, y = stack[-1]
+        choices = []
+        for dx, dy in [(0, 2), (0, -2), (2, 0), (-2, 0)]:
+            nx, ny = x + dx, y + dy
+            if 1 <= nx <= width - 2 and 1 <= ny <= height - 2 and (nx, ny) not in openSquares:
+                choices.append((nx, ny))
+        if not choices:
+            stack.pop()
+            continue
+        nx, ny = rng.choice(choices)
+        openSquares.add(((x + nx) // 2, (y + ny) // 2))
+        openSquares.add((nx, ny))
+        stack.append((nx, ny))
+
+    # Knock through walls that separate two corridors
+    for x in range(1, width - 1):
+        for y in range(1, height - 1):
+            if (x, y) in openSquares or (x % 2 == 1 and y % 2 == 1):
+                continue
+            separates = (((x - 1, y) in openSquares and (x + 1, y) in openSquares) or
+                         ((x, y - 1) in openSquares and (x, y + 1) in openSquares))
+            if separates and rng.random() < loopDensity:
+                openSquares.add((x, y))
+
+    squares = sorted(openSquares)
+    rng.shuffle(squares)
+    if len(squares) < 1 + numGhosts + numCapsules:
+        raise Exception('A %dx%d maze has no room for %d ghosts and %d capsules' %
+                        (width, height, numGhosts, numCapsules))
+    contents = {}
+    contents[squares[0]] = 'P'
+    for square in squares[1:1 + numGhosts]:
+        contents[square] = 'G'
+    for square in squares[1 + numGhosts:1 + numGhosts + numCapsules]:
+        contents[square] = 'o'
+    rest = squares[1 + numGhosts + numCapsules:]
+    for square in rest:
+        if rng.random() < foodDensity:
+            contents[square] = '.'
+    if rest and '.' not in contents.values():
+        contents[rest[0]] = '.'
+
+    rows = []
+    for y in range(height - 1, -1, -1):
+        row = []
+        for x in range(width):
+            if (x, y) not in openSquares:
+                row.append('%')
+            else:
+                row.append(contents.get((x, y), ' '))
+        rows.append(''.join(row))
+    return rows
+
+
+def writeMaze(path, rows):
+    f = open(path, 'w')
+    try:
+        f.write('\n'.join(rows) + '\n')
+    finally:
+        f.close()
+
+
+def readCommand(argv):
+    import optparse
+    parser = optparse.OptionParser(
+        usage='python mazeGenerator.py [options]')
+    parser.add_option('-W', '--width', dest='width', type='int', default=41,
+                      help='Maze width, walls included [Default: %default]')
+    parser.add_option('-H', '--height', dest='height', type='int', default=21,
+                      help='Maze height, walls included [Default: %default]')
+    parser.add_option('--loops', dest='loopDensity', type='float', default=0.1,
+                      help='Chance of removing each wall between corridors [Default: %default]')
+    parser.add_option('--food', dest='foodDensity', type='float', default=0.5,
+                      help='Chance of food on each free square [Default: %default]')
+    parser.add_option('--capsules', dest='numCapsules', type='int', default=2,
+                      help='Number of capsules [Default: %default]')
+    parser.add_option('--ghosts', dest='numGhosts', type='int', default=2,
+                      help='Number of ghosts [Default: %default]')
+    parser.add_option('--seed', dest='seed', type='int', default=0,
+                      help='Random seed [Default: %default]')
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='File to write the maze to [Default: print it]')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    return options
+
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    rows = generateMaze(options.width, options.height, options.loopDensity,
+                        options.foodDensity, options.numCapsules,
+                        options.numGhosts, options.seed)
+    if options.output:
+        writeMaze(options.output, rows)
+    else:
+        print('\n'.join(rows))
@@ -40,7 +40,10 @@ To play your first game, type 'python pacman.py' from the command line.
 The keys are 'a', 's', 'd', and 'w' to move (or arrow keys).  Have fun!
 """
 from game import GameStateData
+from game import ReadOnlyGameStateData
+from game import ReadOnlyBitGrid
 from game import Game
+from game import GameInstrumentation
 from game import Directions
 from game import Actions
 from util import nearestPoint
@@ -77,15 +80,48 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
-    explored = set()
+    # static variable tracking the states generateSuccessor has touched; None
+    # (the default) turns tracking off, see enableExplorationTracking
+    explorationTracker = None
+
+    def enableExplorationTracking(mode='fingerprints', maxFingerprints=1000000):
+        """
+        Starts recording the states passed through generateSuccessor.  See
+        ExplorationTracker for the meaning of mode and maxFingerprints.
+        """
+        GameState.explorationTracker = ExplorationTracker(
+            mode, maxFingerprints)
+    enableExplorationTracking = staticmethod(enableExplorationTracking)
+
+    def disableExplorationTracking():
+        GameState.explorationTracker = None
+    disableExplorationTracking = staticmethod(disableExplorationTracking)
 
     def getAndResetExplored():
-        tmp = GameState.explored.copy()
-        GameState.explored = set()
+        """
+        Returns the set of fingerprints of the states explored since the last
+        call, and starts a fresh record.  Empty unless tracking is enabled in
+        'fingerprints' mode.
+        """
+        tracker = GameState.explorationTracker
+        if tracker == None:
+            return set()
+        tmp = tracker.fingerprints
+        tracker.reset()
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def getNumSuccessorsGenerated():
+        """
+        Returns the number of generateSuccessor calls since tracking was
+        enabled or last reset; 0 when tracking is off.
+        """
+        tracker = GameState.explorationTracker
+        if tracker == None:
+            return 0
+        return tracker.numSuccessors
+    getNumSuccessorsGenerated = staticmethod(getNumSuccessorsGenerated)
+
     def getLegalActions(self, agentIndex=0):
         """
         Returns the legal actions for the agent specified.
@@ -107,7 +143,8 @@ class GameState:
         if self.isWin() or self.isLose():
             raise Exception('Can\'t generate a successor of a terminal state.')
 
-        # Copy current state
+        # Copy current state; unchanged agents, food and capsules are shared
+        # with this state and only cloned by the rules that write them
         state = GameState(self)
 
         # Let agent's logic deal with its action's effects on the board
@@ -121,7 +158,8 @@ class GameState:
         if agentIndex == 0:
             state.data.scoreChange += -TIME_PENALTY  # Penalty for waiting around
         else:
-            GhostRules.decrementTimer(state.data.agentStates[agentIndex])
+            GhostRules.decrementTimer(
+                state.data.getWritableAgentState(agentIndex))
 
         # Resolve multi-agent effects
         GhostRules.checkDeath(state, agentIndex)
@@ -129,8 +167,9 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        state.data.updateZobristHash(self.data)
+        if GameState.explorationTracker != None:
+            GameState.explorationTracker.record(self, state)
         return state
 
     def getLegalPacmanActions(self):
@@ -155,12 +194,16 @@ class GameState:
         return self.data.agentStates[0].getPosition()
 
     def getGhostStates(self):
-        return self.data.agentStates[1:]
+        """
+        Returns copies of the ghosts' AgentStates; the state's own are shared
+        with its predecessors and successors.
+        """
+        return [s.copy() for s in self.data.agentStates[1:]]
 
     def getGhostState(self, agentIndex):
         if agentIndex == 0 or agentIndex >= self.getNumAgents():
             raise Exception("Invalid index passed to getGhostState")
-        return self.data.agentStates[agentIndex]
+        return self.data.agentStates[agentIndex].copy()
 
     def getGhostPosition(self, agentIndex):
         if agentIndex == 0:
@@ -168,7 +211,7 @@ class GameState:
         return self.data.agentStates[agentIndex].getPosition()
 
     def getGhostPositions(self):
-        return [s.getPosition() for s in self.getGhostStates()]
+        return [s.getPosition() for s in self.data.agentStates[1:]]
 
     def getNumAgents(self):
         return len(self.data.agentStates)
@@ -178,12 +221,13 @@ class GameState:
 
     def getCapsules(self):
         """
-        Returns a list of positions (x,y) of the remaining capsules.
+        Returns a list of positions (x,y) of the remaining capsules, a copy
+        of the one the state shares with its predecessors and successors.
         """
-        return self.data.capsules
+        return list(self.data.capsules)
 
     def getNumFood(self):
-        return self.data.food.count()
+        return self.data._numFood
 
     def getFood(self):
         """
@@ -194,6 +238,9 @@ class GameState:
 
         currentFood = state.getFood()
         if currentFood[x][y] == True: ...
+
+        The food Grid is a BitGrid, so currentFood.asList() only visits the
+        remaining pellets and currentFood.count() is a popcount.
         """
         return self.data.food
 
@@ -240,6 +287,20 @@ class GameState:
         state.data = self.data.deepCopy()
         return state
 
+    def simulate(self):
+        """
+        Returns a Simulation starting from this state, for playing out and
+        taking back long sequences of moves.
+        """
+        return Simulation(self)
+
+    def getReadOnlyView(self):
+        """
+        Returns a GameStateView of this state: it shares the state's data
+        instead of copying it, and raises if it is changed.
+        """
+        return GameStateView(self)
+
     def __eq__(self, other):
         """
         Allows two states to be compared.
@@ -256,12 +317,377 @@ class GameState:
 
         return str(self.data)
 
+    def __getstate__(self):
+        # The data pickles compactly; see GameStateData.pack
+        return self.data
+
+    def __setstate__(self, data):
+        self.data = data
+
     def initialize(self, layout, numGhostAgents=1000):
         """
         Creates an initial game state from a layout array (see layout.py).
         """
         self.data.initialize(layout, numGhostAgents)
 
+
+class GameStateView(GameState):
+    """
+    A read-only GameState, which is what Game shows agents.  It answers every
+    accessor and generates successors exactly as the state it views does, but
+    setting an attribute of it, its data, its food grid or its agent states,
+    or changing its capsule list, raises an error.  Successors and deepCopy
+    of a view are ordinary GameStates, so an agent that needs a state it can
+    change takes a deepCopy (or sets mutatesState, see game.Agent).
+
+    Making a view copies nothing.  Accessors that return plain values or
+    copies read the viewed state directly, getFood wraps just the food grid,
+    and the read-only data behind state.data (see game.ReadOnlyGameStateData)
+    is only built the first time it is used, each agent state on its own.
+    """
+
+    def __init__(self, state):
+        self.__dict__['_state'] = state
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Observed states are read only; use deepCopy for a state you can change')
+
+    def getData(self):
+        data = self.__dict__.get('_data')
+        if data == None:
+            data = ReadOnlyGameStateData(self._state.data)
+            self.__dict__['_data'] = data
+        return data
+    data = property(getData)
+
+    def getLegalActions(self, agentIndex=0):
+        return self._state.getLegalActions(agentIndex)
+
+    def generateSuccessor(self, agentIndex, action):
+        return self._state.generateSuccessor(agentIndex, action)
+
+    def getPacmanState(self):
+        return self._state.getPacmanState()
+
+    def getPacmanPosition(self):
+        return self._state.getPacmanPosition()
+
+    def getGhostStates(self):
+        return self._state.getGhostStates()
+
+    def getGhostState(self, agentIndex):
+        return self._state.getGhostState(agentIndex)
+
+    def getGhostPosition(self, agentIndex):
+        return self._state.getGhostPosition(agentIndex)
+
+    def getGhostPositions(self):
+        return self._state.getGhostPositions()
+
+    def getNumAgents(self):
+        return self._state.getNumAgents()
+
+    def getScore(self):
+        return self._state.getScore()
+
+    def getCapsules(self):
+        return self._state.getCapsules()
+
+    def getNumFood(self):
+        return self._state.getNumFood()
+
+    def getFood(self):
+        food = self.__dict__.get('_food')
+        if food == None:
+            food = ReadOnlyBitGrid(self._state.data.food)
+            self.__dict__['_food'] = food
+        return food
+
+    def getWalls(self):
+        return self._state.getWalls()
+
+    def hasFood(self, x, y):
+        return self._state.hasFood(x, y)
+
+    def hasWall(self, x, y):
+        return self._state.hasWall(x, y)
+
+    def isLose(self):
+        return self._state.isLose()
+
+    def isWin(self):
+        return self._state.isWin()
+
+    def deepCopy(self):
+        return self._state.deepCopy()
+
+    def getReadOnlyView(self):
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, GameStateView):
+            other = other._state
+        return self._state == other
+
+    def __hash__(self):
+        return hash(self._state)
+
+    def __str__(self):
+        return str(self._state)
+
+    def __reduce__(self):
+        return (GameStateView, (self._state,))
+
+
+class SimulationData(GameStateData):
+    """
+    The working GameStateData of a Simulation.  Its write barrier also logs
+    the configuration and scared timer of each agent state the first time
+    the current move writes it, so a move records only the agents it
+    actually changed.
+    """
+
+    def __init__(self, prevState):
+        GameStateData.__init__(self, prevState)
+        # (agentIndex, configuration, scaredTimer) before each logged write
+        self.replaced = []
+        self.loggedMoves = [None] * len(self.agentStates)
+        self.moveId = 0
+
+    def getWritableAgentState(self, agentIndex):
+        agentState = self.agentStates[agentIndex]
+        if self.loggedMoves[agentIndex] != self.moveId:
+            self.loggedMoves[agentIndex] = self.moveId
+            self.replaced.append((agentIndex, agentState.configuration,
+                                  agentState.scaredTimer))
+        if agentIndex not in self._ownedAgents:
+            agentState = self.agentStates[agentIndex] = agentState.copy()
+            self._ownedAgents.add(agentIndex)
+        return agentState
+
+
+class Simulation:
+    """
+    A mutable game state for agents that play out long sequences of moves
+    and take them back, such as Monte Carlo rollouts:
+
+      simulation = gameState.simulate()
+      start = simulation.snapshot()
+      for agentIndex, action in moves:
+          if simulation.isOver():
+              break
+          simulation.apply(agentIndex, action)
+      value = evaluationFunction(simulation.getState())
+      simulation.restore(start)
+
+    apply follows exactly the rules of GameState.generateSuccessor, but
+    changes one working state in place and logs only what it replaced: the
+    configuration and scared timer of each agent the move wrote (see
+    SimulationData), the food grid and capsule list if it ate from them,
+    and the hash.  undo puts those back.
+
+    The working state starts out sharing its agent states with the
+    GameState it was built from.  The write barrier of GameStateData copies
+    each of them on its first write, after which the simulation owns it and
+    changes it in place.  getState hands out a state that shares them
+    again, so it also gives up ownership, and the next writes copy afresh.
+    The capsule list is copied whenever a capsule is eaten, so the log can
+    keep the old one.
+    """
+
+    def __init__(self, state):
+        self.state = GameState()
+        self.state.data = SimulationData(state.data)
+        self.copyOutcome(state.data, self.state.data)
+        # apply keeps the hash up to date from here on
+        self.state.data.getZobristHash()
+        self.changes = []
+
+    def copyOutcome(self, source, target):
+        # GameStateData copies everything but what the last move did
+        target._win = source._win
+        target._lose = source._lose
+        target.scoreChange = source.scoreChange
+        target._agentMoved = source._agentMoved
+        target._foodEaten = source._foodEaten
+        target._foodAdded = source._foodAdded
+        target._capsuleEaten = source._capsuleEaten
+
+    def apply(self, agentIndex, action):
+        """
+        Makes agentIndex take action.
+        """
+        state = self.state
+        data = state.data
+        if data._win or data._lose:
+            raise Exception('Can\'t apply an action to a terminal state.')
+        tracker = GameState.explorationTracker
+        parentFingerprint = None
+        if tracker != None and tracker.mode != 'count':
+            parentFingerprint = data.fingerprint()
+        replaced = data.replaced
+        numReplaced = len(replaced)
+        data.moveId += 1
+        eaten = data._eaten
+        # What the move replaces, and what the move before it did
+        self.changes.append((numReplaced, data.food, eaten, data.capsules,
+                             data._zobrist, data._agentMoved,
+                             data._foodEaten, data._capsuleEaten,
+                             data.scoreChange))
+        data._ownsCapsules = False
+        data.scoreChange = 0
+        data._foodEaten = None
+        data._foodAdded = None
+        data._capsuleEaten = None
+
+        if agentIndex == 0:
+            if True in eaten:
+                data._eaten = [False for i in range(len(data.agentStates))]
+            PacmanRules.applyAction(state, action)
+            data.scoreChange += -TIME_PENALTY
+        else:
+            GhostRules.applyAction(state, action, agentIndex)
+            GhostRules.decrementTimer(data.getWritableAgentState(agentIndex))
+        GhostRules.checkDeath(state, agentIndex)
+        data._agentMoved = agentIndex
+        data.score += data.scoreChange
+
+        # Bring the hash up to date, as updateZobristHash does
+        table = data.layout.zobrist
+        zobrist = data._zobrist
+        agentStates = data.agentStates
+        for index, conf, scaredTimer in replaced[numReplaced:]:
+            agentState = agentStates[index]
+            if agentState.configuration is not conf or agentState.scaredTimer != scaredTimer:
+                zobrist ^= table.configurationKey(index, conf, scaredTimer)
+                zobrist ^= table.agentKey(index, agentState)
+        if data._foodEaten != None:
+            zobrist ^= table.foodKey(data._foodEaten)
+        if data._capsuleEaten != None:
+            zobrist ^= table.capsuleKey(data._capsuleEaten)
+        data._zobrist = zobrist
+        if tracker != None:
+            tracker.recordFingerprints(parentFingerprint, data.fingerprint())
+
+    def undo(self):
+        """
+        Takes back the last move applied.
+        """
+        if not self.changes:
+            raise Exception('There is no move to undo')
+        data = self.state.data
+        if data._foodEaten != None:
+            data._numFood += 1
+        data.score -= data.scoreChange
+        (numReplaced, data.food, data._eaten, data.capsules, data._zobrist,
+         data._agentMoved, data._foodEaten, data._capsuleEaten,
+         data.scoreChange) = self.changes.pop()
+        replaced = data.replaced
+        agentStates = data.agentStates
+        while len(replaced) > numReplaced:
+            index, conf, scaredTimer = replaced.pop()
+            agentState = agentStates[index]
+            if agentState.configuration is not conf or agentState.scaredTimer != scaredTimer:
+                # The plain barrier, which copies it if a state from getState
+                # shares it, without logging the write
+                agentState = GameStateData.getWritableAgentState(data, index)
+                agentState.configuration = conf
+                agentState.scaredTimer = scaredTimer
+        data._win = False
+        data._lose = False
+        data._foodAdded = None
+
+    def snapshot(self):
+        """
+        Returns a token that restore takes to return to the current state.
+        The token is only good while the moves made before it are not undone.
+        """
+        return len(self.changes)
+
+    def restore(self, token):
+        if token > len(self.changes):
+            raise Exception('The snapshot has already been undone')
+        while len(self.changes) > token:
+            self.undo()
+
+    def getNumMoves(self):
+        """
+        Returns the number of moves applied and not undone.
+        """
+        return len(self.changes)
+
+    def getState(self):
+        """
+        Returns the current state as an ordinary GameState, which later
+        moves of the simulation leave unchanged.
+        """
+        state = GameState(self.state)
+        self.copyOutcome(self.state.data, state.data)
+        # The new state shares the agent states from here on
+        self.state.data._ownedAgents.clear()
+        return state
+
+    def getLegalActions(self, agentIndex=0):
+        return self.state.getLegalActions(agentIndex)
+
+    def getScore(self):
+        return self.state.getScore()
+
+    def isWin(self):
+        return self.state.isWin()
+
+    def isLose(self):
+        return self.state.isLose()
+
+    def isOver(self):
+        return self.state.isWin() or self.state.isLose()
+
+
+class ExplorationTracker:
+    """
+    Records the states touched by GameState.generateSuccessor.
+
+    In 'count' mode only the number of generateSuccessor calls is kept.  In
+    'fingerprints' mode the fingerprints of the distinct parent and child
+    states are also kept, up to maxFingerprints of them; states first seen
+    after that are only counted, and overflowed is set.
+    """
+
+    def __init__(self, mode='fingerprints', maxFingerprints=1000000):
+        if mode not in ['count', 'fingerprints']:
+            raise Exception('Unknown exploration tracking mode ' + str(mode))
+        self.mode = mode
+        self.maxFingerprints = maxFingerprints
+        self.reset()
+
+    def reset(self):
+        self.numSuccessors = 0
+        self.fingerprints = set()
+        self.overflowed = False
+
+    def record(self, parent, child):
+        if self.mode == 'count':
+            self.numSuccessors += 1
+            return
+        self.recordFingerprints(parent.data.fingerprint(),
+                                child.data.fingerprint())
+
+    def recordFingerprints(self, parentFingerprint, childFingerprint):
+        """
+        Records a successor given the fingerprints of the two states, for
+        callers such as Simulation that no longer have the parent state.
+        """
+        self.numSuccessors += 1
+        if self.mode == 'count':
+            return
+        for fingerprint in (parentFingerprint, childFingerprint):
+            if fingerprint in self.fingerprints:
+                continue
+            if len(self.fingerprints) < self.maxFingerprints:
+                self.fingerprints.add(fingerprint)
+            else:
+                self.overflowed = True
+
 ############################################################################
 #                     THE HIDDEN SECRETS OF PACMAN                         #
 #                                                                          #
@@ -283,11 +709,21 @@ class ClassicGameRules:
     def __init__(self, timeout=30):
         self.timeout = timeout
 
-    def newGame(self, layout, pacmanAgent, ghostAgents, display, quiet=False, catchExceptions=False):
+    def newGame(self, layout, pacmanAgent, ghostAgents, display, quiet=False, catchExceptions=False, trusted=False, instrument=False, recordPath=None):
         agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
         initState = GameState()
         initState.initialize(layout, len(ghostAgents))
-        game = Game(agents, display, self, catchExceptions=catchExceptions)
+        instrumentation = None
+        if instrument:
+            instrumentation = GameInstrumentation(
+                len(agents), GameState.getNumSuccessorsGenerated)
+        recorder = None
+        if recordPath != None:
+            import gameRecord
+            recorder = gameRecord.GameRecorder(recordPath, layout, len(agents))
+        game = Game(agents, display, self, catchExceptions=catchExceptions,
+                    trusted=trusted, instrumentation=instrumentation,
+                    recorder=recorder)
         game.state = initState
         self.initialState = initState.deepCopy()
         self.quiet = quiet
@@ -348,7 +784,11 @@ class PacmanRules:
         """
         Returns a list of possible actions.
         """
-        return Actions.getPossibleActions(state.getPacmanState().configuration, state.data.layout.walls)
+        conf = state.data.agentStates[0].configuration
+        possibleActions = state.data.layout.legalActions.get(conf.pos)
+        if possibleActions == None:
+            return Actions.getPossibleActions(conf, state.data.layout.walls)
+        return list(possibleActions)
     getLegalActions = staticmethod(getLegalActions)
 
     def applyAction(state, action):
@@ -359,7 +799,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[0]
+        pacmanState = state.data.getWritableAgentState(0)
 
         # Update Configuration
         vector = Actions.directionToVector(action, PacmanRules.PACMAN_SPEED)
@@ -382,18 +822,18 @@ class PacmanRules:
             state.data.food = state.data.food.copy()
             state.data.food[x][y] = False
             state.data._foodEaten = position
-            # TODO: cache numFood?
-            numFood = state.getNumFood()
-            if numFood == 0 and not state.data._lose:
+            state.data._numFood -= 1
+            if state.data._numFood == 0 and not state.data._lose:
                 state.data.scoreChange += 500
                 state.data._win = True
         # Eat capsule
-        if(position in state.getCapsules()):
-            state.data.capsules.remove(position)
+        if(position in state.data.capsules):
+            state.data.getWritableCapsules().remove(position)
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.getWritableAgentState(
+                    index).scaredTimer = SCARED_TIME
     consume = staticmethod(consume)
 
 
@@ -408,9 +848,14 @@ class GhostRules:
         Ghosts cannot stop, and cannot turn around unless they
         reach a dead end, but can turn 90 degrees at intersections.
         """
-        conf = state.getGhostState(ghostIndex).configuration
-        possibleActions = Actions.getPossibleActions(
-            conf, state.data.layout.walls)
+        conf = state.data.agentStates[ghostIndex].configuration
+        possibleActions = state.data.layout.legalActions.get(conf.pos)
+        if possibleActions == None:
+            # Scared ghosts can stop between cells
+            possibleActions = Actions.getPossibleActions(
+                conf, state.data.layout.walls)
+        else:
+            possibleActions = list(possibleActions)
         reverse = Actions.reverseDirection(conf.direction)
         if Directions.STOP in possibleActions:
             possibleActions.remove(Directions.STOP)
@@ -425,7 +870,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.getWritableAgentState(ghostIndex)
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0:
             speed /= 2.0
@@ -449,12 +894,14 @@ class GhostRules:
                 ghostState = state.data.agentStates[index]
                 ghostPosition = ghostState.configuration.getPosition()
                 if GhostRules.canKill(pacmanPosition, ghostPosition):
-                    GhostRules.collide(state, ghostState, index)
+                    GhostRules.collide(
+                        state, state.data.getWritableAgentState(index), index)
         else:
             ghostState = state.data.agentStates[agentIndex]
             ghostPosition = ghostState.configuration.getPosition()
             if GhostRules.canKill(pacmanPosition, ghostPosition):
-                GhostRules.collide(state, ghostState, agentIndex)
+                GhostRules.collide(
+                    state, state.data.getWritableAgentState(agentIndex), agentIndex)
     checkDeath = staticmethod(checkDeath)
 
     def collide(state, ghostState, agentIndex):
@@ -462,7 +909,8 @@ class GhostRules:
             state.data.scoreChange += 200
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
-            # Added for first-person
+            # Added for first-person; the list may be shared with the parent
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agentIndex] = True
         else:
             if not state.data._win:
@@ -543,7 +991,9 @@ def readCommand(argv):
     parser.add_option('-r', '--recordActions', action='store_true', dest='record',
                       help='Writes game histories to a file (named by the time they were played)', default=False)
     parser.add_option('--replay', dest='gameToReplay',
-                      help='A recorded game file (pickle) to replay', default=None)
+                      help='A recorded game file to replay', default=None)
+    parser.add_option('--replayFrom', dest='replayFrom', type='int',
+                      help=default('The ply at which to start a replay'), default=0)
     parser.add_option('-a', '--agentArgs', dest='agentArgs',
                       help='Comma separated values sent to agent. e.g. "opt1=val1,opt2,opt3=val3"')
     parser.add_option('-x', '--numTraining', dest='numTraining', type='int',
@@ -552,8 +1002,16 @@ def readCommand(argv):
                       help=default('Time to delay between frames; <0 means keyboard'), default=0.1)
     parser.add_option('-c', '--catchExceptions', action='store_true', dest='catchExceptions',
                       help='Turns on exception handling and timeouts during games', default=False)
-    parser.add_option('--timeout', dest='timeout', type='int',
+    parser.add_option('--timeout', dest='timeout', type='float',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--trusted', action='store_true', dest='trusted',
+                      help='Play without muting or timing agents, for agents known to behave (ignored with -c)', default=False)
+    parser.add_option('--layoutIndex', dest='layoutIndex',
+                      help='A pre-parsed layout index written by layout.py to load layouts from', default=None)
+    parser.add_option('--workers', dest='workers', type='int',
+                      help=default('Number of processes to spread the games over'), default=1)
+    parser.add_option('--instrument', dest='instrumentFile',
+                      help='Append per-game agent timing and search effort to this file as JSON lines', default=None)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -565,6 +1023,8 @@ def readCommand(argv):
         random.seed('cs188')
 
     # Choose a layout
+    if options.layoutIndex:
+        layout.REGISTRY.loadIndex(options.layoutIndex)
     args['layout'] = layout.getLayout(options.layout)
     if args['layout'] == None:
         raise Exception("The layout " + options.layout + " cannot be found")
@@ -606,18 +1066,39 @@ def readCommand(argv):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['trusted'] = options.trusted
+    args['seedGames'] = options.fixRandomSeed
+    if options.instrumentFile:
+        args['instrumentFile'] = options.instrumentFile
+        # Written into every record so runs can be compared later
+        args['instrumentTags'] = {'layout': options.layout, 'pacman': options.pacman,
+                                  'ghost': options.ghost, 'numGhosts': options.numGhosts,
+                                  'agentArgs': options.agentArgs}
+    if options.workers > 1:
+        # Worker processes rebuild the agents from these rather than
+        # receiving pickled copies
+        args['workers'] = options.workers
+        args['agentSpec'] = {'pacman': options.pacman, 'pacmanArgs': agentOpts,
+                             'ghost': options.ghost, 'numGhosts': options.numGhosts}
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
         print('Replaying recorded game %s.' % options.gameToReplay)
-        import pickle
-        f = open(options.gameToReplay)
-        try:
-            recorded = pickle.load(f)
-        finally:
-            f.close()
-        recorded['display'] = args['display']
-        replayGame(**recorded)
+        import gameRecord
+        if gameRecord.isGameRecord(options.gameToReplay):
+            record = gameRecord.readGameRecord(options.gameToReplay)
+            replayGame(record.layout, record.moves, args['display'],
+                       record.getState(options.replayFrom), options.replayFrom)
+        else:
+            # Records written before the binary format were pickles
+            import pickle
+            f = open(options.gameToReplay, 'rb')
+            try:
+                recorded = pickle.load(f)
+            finally:
+                f.close()
+            recorded['display'] = args['display']
+            replayGame(**recorded)
         sys.exit(0)
 
     return args
@@ -651,7 +1132,11 @@ def loadAgent(pacman, nographics):
                     ' is not specified in any *Agents.py.')
 
 
-def replayGame(layout, actions, display):
+def replayGame(layout, actions, display, startState=None, startPly=0):
+    """
+    Shows a recorded game.  To start part way through, pass the state after
+    the first startPly actions as startState.
+    """
     import pacmanAgents
     import ghostAgents
     rules = ClassicGameRules()
@@ -659,9 +1144,11 @@ def replayGame(layout, actions, display):
                                              for i in range(layout.getNumGhosts())]
     game = rules.newGame(layout, agents[0], agents[1:], display)
     state = game.state
+    if startState != None:
+        state = game.state = startState
     display.initialize(state.data)
 
-    for action in actions:
+    for action in actions[startPly:]:
             # Execute the action
         state = state.generateSuccessor(*action)
         # Change the display
@@ -672,39 +1159,71 @@ def replayGame(layout, actions, display):
     display.finish()
 
 
-def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30):
+def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30, workers=1, agentSpec=None, instrumentFile=None, instrumentTags={}, trusted=False, seedGames=False):
+    if workers > 1:
+        if numTraining > 0:
+            raise Exception('Training games must be played in a single process')
+        return runGamesInWorkers(layout, agentSpec, numGames, workers, catchExceptions, timeout,
+                                 instrumentFile, instrumentTags, record, trusted)
+
     import __main__
     __main__.__dict__['_display'] = display
 
     rules = ClassicGameRules(timeout)
     games = []
+    import textDisplay
+    if seedGames:
+        # Game i is seeded with baseSeed + i, as in runGamesInWorkers, so
+        # seeded runs play the same games whatever the number of workers
+        baseSeed = random.randrange(2 ** 32)
+
+    instrument = instrumentFile != None
+    startedTracking = False
+    if instrument and GameState.explorationTracker == None:
+        # Successor counts come from the exploration tracker
+        GameState.enableExplorationTracking('count')
+        startedTracking = True
 
     for i in range(numGames):
         beQuiet = i < numTraining
         if beQuiet:
                 # Suppress output and graphics
-            import textDisplay
             gameDisplay = textDisplay.NullGraphics()
             rules.quiet = True
         else:
             gameDisplay = display
             rules.quiet = False
+        recordPath = None
+        if record:
+            recordPath = recordingName(i)
+        seed = None
+        if seedGames:
+            seed = baseSeed + i
+            random.seed(seed)
         game = rules.newGame(layout, pacman, ghosts,
-                             gameDisplay, beQuiet, catchExceptions)
-        game.run()
+                             gameDisplay, beQuiet, catchExceptions, trusted, instrument,
+                             recordPath)
+        game.seed = seed
+        startTime = time.time()
+        try:
+            game.run()
+        finally:
+            if game.recorder != None:
+                game.recorder.close()
+        game.playTime = time.time() - startTime
         if not beQuiet:
             games.append(game)
 
-        if record:
-            import time
-            import pickle
-            fname = ('recorded-game-%d' % (i + 1)) + \
-                '-'.join([str(t) for t in time.localtime()[1:6]])
-            f = file(fname, 'w')
-            components = {'layout': layout, 'actions': game.moveHistory}
-            pickle.dump(components, f)
+        if instrument:
+            f = open(instrumentFile, 'a')
+            game.instrumentation.writeJsonLine(
+                f, game=i, training=beQuiet, score=game.state.getScore(),
+                win=game.state.isWin(), moves=len(game.moveHistory), **instrumentTags)
             f.close()
 
+    if startedTracking:
+        GameState.disableExplorationTracking()
+
     if (numGames-numTraining) > 0:
         scores = [game.state.getScore() for game in games]
         wins = [game.state.isWin() for game in games]
@@ -719,6 +1238,109 @@ def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, c
     return games
 
 
+def recordingName(gameIndex):
+    "The file a recorded game is written to, named by when it was played"
+    return ('recorded-game-%d-' % (gameIndex + 1)) + \
+        '-'.join([str(t) for t in time.localtime()[1:6]]) + '.rec'
+
+
+def runGamesInWorkers(layout, agentSpec, numGames, workers, catchExceptions=False, timeout=30, instrumentFile=None, instrumentTags={}, record=False, trusted=False):
+    """
+    Plays numGames headless games spread over a pool of worker processes and
+    returns the finished Games, in game order, as runGames does.  The
+    returned Games keep their state, move history and figures but not their
+    agents or display, which stay in the workers.
+
+    Game i is seeded with baseSeed + i, where baseSeed is drawn from the
+    parent's random state exactly as in runGames with seedGames, so a run
+    with --fixRandomSeed plays the same games whatever the number of workers.
+    The workers play quietly, and each game's win or loss is reported once
+    all of them are done, in game order.
+    agentSpec names the agent classes and arguments (see readCommand); every
+    game builds fresh agents from it with loadAgent.
+    """
+    import multiprocessing
+    baseSeed = random.randrange(2 ** 32)
+    jobs = [{'index': i, 'seed': baseSeed + i, 'layout': layout, 'agentSpec': agentSpec,
+             'catchExceptions': catchExceptions, 'timeout': timeout, 'trusted': trusted,
+             'instrument': instrumentFile != None,
+             'recordPath': record and recordingName(i) or None}
+            for i in range(numGames)]
+    startTime = time.time()
+    pool = multiprocessing.Pool(workers)
+    try:
+        games = pool.map(runGameInWorker, jobs, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    wallTime = time.time() - startTime
+
+    # The messages ClassicGameRules.win and lose print in a single process
+    for game in games:
+        if game.state.isWin():
+            print("Pacman emerges victorious! Score: %d" % game.state.data.score)
+        elif game.state.isLose():
+            print("Pacman died! Score: %d" % game.state.data.score)
+
+    if instrumentFile != None:
+        f = open(instrumentFile, 'a')
+        for i, game in enumerate(games):
+            game.instrumentation.writeJsonLine(
+                f, game=i, training=False, score=game.state.getScore(),
+                win=game.state.isWin(), moves=len(game.moveHistory), **instrumentTags)
+        f.close()
+
+    scores = [game.state.getScore() for game in games]
+    wins = [game.state.isWin() for game in games]
+    winRate = wins.count(True) / float(len(wins))
+    print('Average Score:', sum(scores) / float(len(scores)))
+    print('Scores:       ', ', '.join([str(score) for score in scores]))
+    print('Win Rate:      %d/%d (%.2f)' %
+          (wins.count(True), len(wins), winRate))
+    print('Record:       ', ', '.join(
+        [['Loss', 'Win'][int(w)] for w in wins]))
+    print('Game times:   ', ', '.join(
+        ['%.2fs' % game.playTime for game in games]))
+    print('Wall clock:    %.2fs with %d workers' % (wallTime, workers))
+    return games
+
+
+def runGameInWorker(job):
+    """
+    Plays one game described by a runGamesInWorkers job and returns the
+    finished Game, without its agents and display.  Runs in a worker
+    process.
+    """
+    import textDisplay
+    random.seed(job['seed'])
+    spec = job['agentSpec']
+    pacmanType = loadAgent(spec['pacman'], True)
+    pacman = pacmanType(**spec['pacmanArgs'])
+    ghostType = loadAgent(spec['ghost'], True)
+    ghosts = [ghostType(i+1) for i in range(spec['numGhosts'])]
+
+    if job['instrument'] and GameState.explorationTracker == None:
+        GameState.enableExplorationTracking('count')
+    rules = ClassicGameRules(job['timeout'])
+    game = rules.newGame(job['layout'], pacman, ghosts, textDisplay.NullGraphics(),
+                         True, job['catchExceptions'], job['trusted'],
+                         job['instrument'], job['recordPath'])
+    startTime = time.time()
+    try:
+        game.run()
+    finally:
+        if game.recorder != None:
+            game.recorder.close()
+    game.seed = job['seed']
+    game.playTime = time.time() - startTime
+    if game.instrumentation != None:
+        # Only the figures travel back to the parent
+        game.instrumentation.countSuccessors = None
+    game.agents = game.display = game.rules = game.recorder = None
+    game.agentOutput = None
+    return game
+
+
 if __name__ == '__main__':
     """
     The main function called when pacman.py is run
@@ -0,0 +1,133 @@
+# test_bitGrid.py
+# ---------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game import BitGrid, Grid
+
+# Sizes around the 30 cells packed into each int, and real maze sizes
+SIZES = [(1, 1), (1, 30), (5, 6), (6, 5), (7, 9), (31, 1), (20, 7), (28, 27)]
+
+
+def getRandomGrids(width, height, rng, density=0.5):
+    "A Grid and a BitGrid with the same randomly chosen cells set"
+    grid = Grid(width, height)
+    bitGrid = BitGrid(width, height)
+    for x in range(width):
+        for y in range(height):
+            if rng.random() < density:
+                grid[x][y] = True
+                bitGrid[x][y] = True
+    return grid, bitGrid
+
+
+class BitGridTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(0)
+
+    def eachGrid(self):
+        for width, height in SIZES:
+            for density in [0.0, 0.1, 0.5, 1.0]:
+                yield getRandomGrids(width, height, self.rng, density)
+
+    def testCellsMatchGrid(self):
+        for grid, bitGrid in self.eachGrid():
+            for x in range(grid.width):
+                for y in range(grid.height):
+                    self.assertEqual(bitGrid[x][y], grid[x][y])
+            self.assertEqual(bitGrid.data, grid.data)
+            self.assertEqual(str(bitGrid), str(grid))
+
+    def testPackBitsMatchesGrid(self):
+        for grid, bitGrid in self.eachGrid():
+            self.assertEqual(bitGrid.packBits(), grid.packBits())
+
+    def testPackBitsRoundTrip(self):
+        for grid, bitGrid in self.eachGrid():
+            packed = bitGrid.packBits()
+            width, height = packed[:2]
+            self.assertEqual((width, height), (bitGrid.width, bitGrid.height))
+            self.assertEqual(BitGrid(width, height, bitRepresentation=packed[2:]), bitGrid)
+            # Each kind of grid unpacks what the other packed
+            self.assertEqual(Grid(width, height, bitRepresentation=packed[2:]), grid)
+            self.assertEqual(BitGrid(width, height, bitRepresentation=grid.packBits()[2:]),
+                             bitGrid)
+
+    def testUnpackRejectsNegativeInts(self):
+        self.assertRaises(ValueError, BitGrid, 3, 3, False, (-1,))
+
+    def testCount(self):
+        for grid, bitGrid in self.eachGrid():
+            self.assertEqual(bitGrid.count(), grid.count())
+            self.assertEqual(bitGrid.count(True), grid.count(True))
+            self.assertEqual(bitGrid.count(False), grid.count(False))
+
+    def testAsList(self):
+        for grid, bitGrid in self.eachGrid():
+            self.assertEqual(bitGrid.asList(), grid.asList())
+            self.assertEqual(bitGrid.asList(False), grid.asList(False))
+
+    def testInitialValue(self):
+        full = BitGrid(4, 5, True)
+        self.assertEqual(full.count(), 20)
+        self.assertEqual(full, Grid(4, 5, True))
+        self.assertRaises(Exception, BitGrid, 4, 5, 'food')
+
+    def testCopiesAreIndependent(self):
+        for grid, bitGrid in self.eachGrid():
+            original = bitGrid.packBits()
+            for copy in [bitGrid.copy(), bitGrid.deepCopy(), bitGrid.shallowCopy()]:
+                self.assertEqual(copy, bitGrid)
+                copy[0][0] = not copy[0][0]
+                self.assertNotEqual(copy, bitGrid)
+                self.assertEqual(bitGrid.packBits(), original)
+            copy = bitGrid.copy()
+            bitGrid[0][0] = not bitGrid[0][0]
+            self.assertEqual(copy.packBits(), original)
+            bitGrid[0][0] = not bitGrid[0][0]
+
+    def testEqualityAndHash(self):
+        for grid, bitGrid in self.eachGrid():
+            self.assertEqual(bitGrid, grid)
+            self.assertTrue(bitGrid == grid)
+            self.assertFalse(bitGrid == None)
+            other = bitGrid.copy()
+            self.assertEqual(hash(other), hash(bitGrid))
+            grid[0][0] = not grid[0][0]
+            self.assertNotEqual(bitGrid, grid)
+        # Same cells set, different shape
+        self.assertNotEqual(BitGrid(2, 3), BitGrid(3, 2))
+
+    def testColumns(self):
+        bitGrid = BitGrid(3, 4)
+        bitGrid[2][3] = True
+        self.assertTrue(bitGrid[-1][-1])
+        self.assertEqual(len(bitGrid[0]), 4)
+        self.assertEqual(bitGrid.asList(), [(2, 3)])
+        bitGrid[1] = [True, False, True, False]
+        self.assertEqual(bitGrid.asList(), [(1, 0), (1, 2), (2, 3)])
+        bitGrid[2][3] = False
+        self.assertEqual(bitGrid.count(), 2)
+        self.assertRaises(IndexError, lambda: bitGrid[3])
+        self.assertRaises(IndexError, lambda: bitGrid[0][4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+# test_gameStateView.py
+# ---------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import layout
+from game import Directions
+from pacman import GameState
+
+
+def getState(layoutName='mediumClassic', numGhosts=2):
+    state = GameState()
+    state.initialize(layout.getLayout(layoutName), numGhosts)
+    return state
+
+
+class GameStateViewTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state = getState()
+        self.original = self.state.deepCopy()
+        self.view = self.state.getReadOnlyView()
+
+    def assertUnchanged(self):
+        self.assertEqual(self.state, self.original)
+        self.assertEqual(hash(self.state), hash(self.original))
+        self.assertEqual(self.state.getFood(), self.original.getFood())
+        self.assertEqual(self.state.getCapsules(), self.original.getCapsules())
+        for index in range(self.state.getNumAgents()):
+            agentState = self.state.data.agentStates[index]
+            originalState = self.original.data.agentStates[index]
+            self.assertEqual(agentState.configuration, originalState.configuration)
+            self.assertEqual(agentState.start, originalState.start)
+            self.assertEqual(agentState.scaredTimer, originalState.scaredTimer)
+
+    def testAccessorsMatchState(self):
+        self.assertEqual(self.view.getPacmanPosition(), self.state.getPacmanPosition())
+        self.assertEqual(self.view.getGhostPositions(), self.state.getGhostPositions())
+        self.assertEqual(self.view.getGhostStates(), self.state.getGhostStates())
+        self.assertEqual(self.view.getGhostState(1), self.state.getGhostState(1))
+        self.assertEqual(self.view.getCapsules(), self.state.getCapsules())
+        self.assertEqual(self.view.getFood(), self.state.getFood())
+        self.assertEqual(self.view.getWalls(), self.state.getWalls())
+        self.assertEqual(self.view.getScore(), self.state.getScore())
+        self.assertEqual(self.view.getLegalActions(0), self.state.getLegalActions(0))
+        self.assertEqual(self.view, self.state)
+        self.assertEqual(hash(self.view), hash(self.state))
+
+    def testViewRejectsMutation(self):
+        view = self.view
+        with self.assertRaises(AttributeError):
+            view.data = self.state.data
+        with self.assertRaises(AttributeError):
+            view.data.score = 100
+        with self.assertRaises(AttributeError):
+            view.getFood()[1][1] = True
+        with self.assertRaises(AttributeError):
+            view.data.food[1][1] = True
+        with self.assertRaises(AttributeError):
+            view.data.capsules.append((1, 1))
+        with self.assertRaises(TypeError):
+            view.data.agentStates[0] = view.data.agentStates[1]
+        with self.assertRaises(AttributeError):
+            view.data.agentStates[0].scaredTimer = 40
+        with self.assertRaises(AttributeError):
+            view.data.agentStates[1].configuration.pos = (1, 1)
+        with self.assertRaises(AttributeError):
+            view.data.agentStates[1].start.direction = Directions.EAST
+        with self.assertRaises(AttributeError):
+            view.data.getWritableAgentState(0)
+        with self.assertRaises(AttributeError):
+            view.data.getWritableCapsules()
+        self.assertUnchanged()
+
+    def testReturnedCopiesDoNotReachState(self):
+        ghostState = self.view.getGhostState(1)
+        ghostState.scaredTimer = 40
+        ghostState.configuration.pos = (1, 1)
+        for ghostState in self.view.getGhostStates():
+            ghostState.scaredTimer = 40
+        self.view.getPacmanState().scaredTimer = 40
+        self.view.getCapsules().append((1, 1))
+        self.assertUnchanged()
+
+    def testSuccessorsAndCopiesAreWritable(self):
+        action = self.view.getLegalActions(0)[0]
+        successor = self.view.generateSuccessor(0, action)
+        self.assertEqual(successor, self.state.generateSuccessor(0, action))
+        successor.data.food[1][1] = True
+        successor.data.getWritableAgentState(1).scaredTimer = 40
+        copy = self.view.deepCopy()
+        copy.data.score = 100
+        copy.data.getWritableCapsules().append((1, 1))
+        self.assertUnchanged()
+
+    def testAgentStatesAreWrappedOnDemand(self):
+        agentStates = self.view.data.agentStates
+        self.assertEqual(len(agentStates), self.state.getNumAgents())
+        pacmanState = agentStates[0]
+        self.assertIs(agentStates[0], pacmanState)
+        self.assertEqual(list(agentStates), list(self.state.data.agentStates))
+        self.assertEqual(list(agentStates[1:]), list(self.state.data.agentStates[1:]))
+        self.assertEqual(agentStates[-1], self.state.data.agentStates[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
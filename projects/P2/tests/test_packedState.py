@@ -0,0 +1,136 @@
+# test_packedState.py
+# -------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+import os
+import pickle
+import random
+import subprocess
+import sys
+import unittest
+
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIRECTORY)
+
+import layout
+from game import GameStateData
+from pacman import GameState
+
+# Unpickles a state sent on stdin in a new interpreter, which has never
+# seen its layout, and sends back what it found
+FRESH_PROCESS_SCRIPT = '''
+import pickle, sys
+sys.path.insert(0, sys.argv[1])
+state = pickle.loads(sys.stdin.buffer.read())
+successor = state.generateSuccessor(0, state.getLegalActions(0)[0])
+sys.stdout.buffer.write(pickle.dumps((
+    state.data.pack(), state.data.layout.layoutText, state.getScore(),
+    state.getNumFood(), state.getLegalActions(0), successor.data.pack())))
+'''
+
+
+def playRandomly(state, numMoves, rng):
+    "The states of a random game, from state on"
+    states = [state]
+    for move in range(numMoves):
+        if state.isWin() or state.isLose():
+            break
+        agentIndex = move % state.getNumAgents()
+        state = state.generateSuccessor(
+            agentIndex, rng.choice(state.getLegalActions(agentIndex)))
+        states.append(state)
+    return states
+
+
+class PackedStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.layout = layout.getLayout('mediumClassic')
+        start = GameState()
+        start.initialize(self.layout, 2)
+        self.states = playRandomly(start, 150, random.Random(0))
+        # Random ghosts rarely let Pacman reach a capsule, so add a state
+        # with scared and eaten ghosts, a capsule gone and a negative score
+        state = self.states[10].deepCopy()
+        state.data.getWritableAgentState(1).scaredTimer = 17
+        state.data._eaten = [False, False, True]
+        state.data.getWritableCapsules().pop()
+        state.data.score = -123
+        state.data.invalidateZobristHash()
+        self.states.append(state)
+
+    def assertSameState(self, state, expected):
+        self.assertEqual(state, expected)
+        self.assertEqual(state.getScore(), expected.getScore())
+        self.assertEqual(state.getNumFood(), expected.getNumFood())
+        self.assertEqual(state.getCapsules(), expected.getCapsules())
+        self.assertEqual(state.data._eaten, expected.data._eaten)
+        self.assertEqual(state.isWin(), expected.isWin())
+        self.assertEqual(state.isLose(), expected.isLose())
+        self.assertEqual([s.scaredTimer for s in state.data.agentStates],
+                         [s.scaredTimer for s in expected.data.agentStates])
+        self.assertEqual(state.data.getZobristHash(),
+                         expected.data.getZobristHash())
+
+    def testPackUnpack(self):
+        for state in self.states:
+            packed = state.data.pack()
+            self.assertTrue(len(packed) < 200)
+            data = GameStateData.unpack(self.layout, packed)
+            restored = GameState()
+            restored.data = data
+            self.assertSameState(restored, state)
+            self.assertEqual(data.pack(), packed)
+
+    def testPickleSharesLayout(self):
+        for state in self.states:
+            restored = pickle.loads(pickle.dumps(state))
+            self.assertSameState(restored, state)
+            self.assertIs(restored.data.layout, self.layout)
+
+    def testPickleView(self):
+        view = self.states[-1].getReadOnlyView()
+        restored = pickle.loads(pickle.dumps(view))
+        self.assertEqual(type(restored), type(view))
+        self.assertSameState(restored, self.states[-1])
+
+    def testPickleInFreshProcess(self):
+        state = [s for s in self.states if not s.isWin() and not s.isLose()][-1]
+        result = subprocess.run(
+            [sys.executable, '-c', FRESH_PROCESS_SCRIPT, PROJECT_DIRECTORY],
+            input=pickle.dumps(state), stdout=subprocess.PIPE, check=True)
+        (packed, layoutText, score, numFood, legalActions,
+         successorPacked) = pickle.loads(result.stdout)
+        self.assertEqual(packed, state.data.pack())
+        self.assertEqual(layoutText, self.layout.layoutText)
+        self.assertEqual(score, state.getScore())
+        self.assertEqual(numFood, state.getNumFood())
+        self.assertEqual(legalActions, state.getLegalActions(0))
+        successor = state.generateSuccessor(0, legalActions[0])
+        self.assertEqual(successorPacked, successor.data.pack())
+
+    def testRestoreLayout(self):
+        lay = self.layout
+        self.assertIs(layout.restoreLayout(lay.fingerprint, lay.packedText), lay)
+
+    def testRestoreLayoutRejectsUnknownFingerprint(self):
+        # The fingerprint is not one this process knows, and the text sent
+        # with it does not hash to it
+        fingerprint = bytes(len(self.layout.fingerprint))
+        self.assertFalse(fingerprint in layout.LAYOUTS_BY_FINGERPRINT)
+        self.assertRaises(Exception, layout.restoreLayout,
+                          fingerprint, self.layout.packedText)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# test_priorityQueue.py
+# ---------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from util import PriorityQueue, PriorityQueueWithFunction
+
+
+class ReferenceQueue:
+    """
+    The behaviour PriorityQueue must have, by brute force: pop takes the
+    lowest priority, ties going to the earliest push, and update lowers the
+    priority of the copy of an item that would be popped first.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.count = 0
+
+    def push(self, item, priority):
+        self.entries.append([priority, self.count, item])
+        self.count += 1
+
+    def pop(self):
+        entry = min(self.entries)
+        self.entries.remove(entry)
+        return entry[2]
+
+    def update(self, item, priority):
+        entries = [entry for entry in self.entries if entry[2] == item]
+        if not entries:
+            self.push(item, priority)
+            return
+        entry = min(entries)
+        if entry[0] > priority:
+            entry[0] = priority
+
+    def isEmpty(self):
+        return len(self.entries) == 0
+
+    def __contains__(self, item):
+        return item in [entry[2] for entry in self.entries]
+
+
+class PriorityQueueTest(unittest.TestCase):
+
+    def playRandomly(self, rng, numOperations, numItems, numPriorities, useIndex):
+        queue = PriorityQueue()
+        reference = ReferenceQueue()
+        for operation in range(numOperations):
+            choice = rng.random()
+            item = rng.randrange(numItems)
+            priority = rng.randrange(numPriorities)
+            if choice < 0.4:
+                queue.push(item, priority)
+                reference.push(item, priority)
+            elif choice < 0.7:
+                if reference.isEmpty():
+                    continue
+                self.assertEqual(queue.pop(), reference.pop())
+            elif useIndex and choice < 0.9:
+                queue.update(item, priority)
+                reference.update(item, priority)
+            elif useIndex:
+                self.assertEqual(item in queue, item in reference)
+            self.assertEqual(queue.isEmpty(), reference.isEmpty())
+        while not reference.isEmpty():
+            self.assertEqual(queue.pop(), reference.pop())
+        self.assertTrue(queue.isEmpty())
+
+    def testPushAndPop(self):
+        rng = random.Random(0)
+        for trial in range(50):
+            self.playRandomly(rng, 300, 40, 10, False)
+
+    def testUpdateAndMembership(self):
+        rng = random.Random(1)
+        for trial in range(50):
+            self.playRandomly(rng, 300, 40, 10, True)
+
+    def testManyDuplicates(self):
+        rng = random.Random(2)
+        for trial in range(50):
+            self.playRandomly(rng, 300, 4, 5, True)
+
+    def testUnhashableItemsWithoutIndex(self):
+        queue = PriorityQueue()
+        queue.push([3], 2)
+        queue.push([1], 1)
+        queue.push([2], 1)
+        self.assertEqual([queue.pop(), queue.pop(), queue.pop()], [[1], [2], [3]])
+
+    def testPriorityFunction(self):
+        queue = PriorityQueueWithFunction(lambda item: -item)
+        for item in [3, 1, 4, 1, 5]:
+            queue.push(item)
+        self.assertEqual([queue.pop() for i in range(5)], [5, 4, 3, 1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+# test_simulation.py
+# ------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import layout
+from pacman import GameState
+
+
+def getDistances(walls, targets):
+    "Maze distances to the nearest of targets, by breadth first search"
+    distances = dict([(target, 0) for target in targets])
+    frontier = list(targets)
+    while frontier:
+        nextFrontier = []
+        for x, y in frontier:
+            for cell in [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]:
+                if cell not in distances and not walls[cell[0]][cell[1]]:
+                    distances[cell] = distances[(x, y)] + 1
+                    nextFrontier.append(cell)
+        frontier = nextFrontier
+    return distances
+
+
+def chooseAction(state, agentIndex, rng):
+    """
+    A random action, except that Pacman mostly heads for the nearest
+    capsule, or scared ghost, and away from losing, so that the rollouts
+    eat both often.
+    """
+    actions = state.getLegalActions(agentIndex)
+    if agentIndex != 0 or rng.random() < 0.2:
+        return rng.choice(actions)
+    targets = state.getCapsules()
+    if not targets:
+        targets = [ghostState.getPosition() for ghostState in state.getGhostStates()
+                   if ghostState.scaredTimer > 0]
+    distances = getDistances(state.getWalls(),
+                             [(int(x), int(y)) for x, y in targets])
+    best = []
+    for action in actions:
+        successor = state.generateSuccessor(0, action)
+        score = distances.get(successor.getPacmanPosition(), 0)
+        if successor.isLose():
+            score = 1000
+        best.append((score, rng.random(), action))
+    return min(best)[2]
+
+
+class SimulationTest(unittest.TestCase):
+    """
+    Plays random moves on a Simulation, taking some of them back along the
+    way, and checks every state against the one generateSuccessor reaches.
+    """
+
+    def assertSameState(self, state, expected):
+        self.assertEqual(state, expected)
+        self.assertEqual(hash(state), hash(expected))
+        self.assertEqual(state.data.getZobristHash(),
+                         expected.data.getZobristHash())
+        # The hash kept up by the moves must match one computed afresh
+        fresh = state.deepCopy()
+        fresh.data.invalidateZobristHash()
+        self.assertEqual(state.data.getZobristHash(),
+                         fresh.data.getZobristHash())
+        self.assertEqual(state.getScore(), expected.getScore())
+        self.assertEqual(state.getNumFood(), expected.getNumFood())
+        self.assertEqual(state.getCapsules(), expected.getCapsules())
+        self.assertEqual(state.isWin(), expected.isWin())
+        self.assertEqual(state.isLose(), expected.isLose())
+        self.assertEqual([s.scaredTimer for s in state.data.agentStates],
+                         [s.scaredTimer for s in expected.data.agentStates])
+        for name in ['_agentMoved', '_foodEaten', '_capsuleEaten',
+                     'scoreChange', '_eaten']:
+            self.assertEqual(getattr(state.data, name),
+                             getattr(expected.data, name), name)
+
+    def playRandomly(self, layoutName, numRollouts, seed):
+        lay = layout.getLayout(layoutName)
+        start = GameState()
+        start.initialize(lay, lay.getNumGhosts())
+        numAgents = start.getNumAgents()
+        rng = random.Random(seed)
+        simulation = start.simulate()
+        for rollout in range(numRollouts):
+            states = [start]
+            tokens = [simulation.snapshot()]
+            handedOut = []
+            for ply in range(rng.randint(1, 200)):
+                state = states[-1]
+                if state.isWin() or state.isLose():
+                    self.assertTrue(simulation.isOver())
+                    break
+                agentIndex = ply % numAgents
+                action = chooseAction(state, agentIndex, rng)
+                states.append(state.generateSuccessor(agentIndex, action))
+                simulation.apply(agentIndex, action)
+                tokens.append(simulation.snapshot())
+                self.assertEqual(simulation.getNumMoves(), len(states) - 1)
+                if rng.random() < 0.2:
+                    handedOut.append((simulation.getState(), states[-1]))
+                if rng.random() < 0.1 and len(states) > 2:
+                    keep = rng.randrange(1, len(states))
+                    simulation.restore(tokens[keep - 1])
+                    del states[keep:]
+                    del tokens[keep:]
+                self.assertSameState(simulation.getState(), states[-1])
+            # Later moves must not have changed the states handed out
+            for state, expected in handedOut:
+                self.assertSameState(state, expected)
+            simulation.restore(0)
+            self.assertSameState(simulation.getState(), start)
+        # Nor the state the simulation started from
+        fresh = GameState()
+        fresh.initialize(lay, lay.getNumGhosts())
+        self.assertSameState(start, fresh)
+
+    def testMediumClassic(self):
+        self.playRandomly('mediumClassic', 30, 1)
+
+    def testSmallClassic(self):
+        self.playRandomly('smallClassic', 30, 2)
+
+    def testTrickyClassic(self):
+        self.playRandomly('trickyClassic', 30, 3)
+
+    def testCapsuleClassic(self):
+        self.playRandomly('capsuleClassic', 30, 4)
+
+    def testUndoErrors(self):
+        lay = layout.getLayout('smallClassic')
+        start = GameState()
+        start.initialize(lay, lay.getNumGhosts())
+        simulation = start.simulate()
+        self.assertRaises(Exception, simulation.undo)
+        simulation.apply(0, start.getLegalActions(0)[0])
+        token = simulation.snapshot()
+        simulation.restore(0)
+        self.assertRaises(Exception, simulation.restore, token)
+
+
+if __name__ == '__main__':
+    unittest.main()
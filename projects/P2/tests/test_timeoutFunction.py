@@ -0,0 +1,97 @@
+# test_timeoutFunction.py
+# -----------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import util
+from util import TimeoutFunction, TimeoutFunctionException
+
+
+def spin(seconds):
+    endTime = time.time() + seconds
+    while time.time() < endTime:
+        pass
+    return seconds
+
+
+class TimeoutFunctionTest(unittest.TestCase):
+
+    def assertNoDeadlines(self):
+        self.assertEqual(util._WATCHDOG._stack(), [])
+        self.assertEqual(util.getTimeRemaining(), None)
+
+    def testReturnsResultInTime(self):
+        timed = TimeoutFunction(spin, 1.0)
+        self.assertEqual(timed(0.01), 0.01)
+        self.assertTrue(0 < timed.budgetUsed < 1)
+        self.assertNoDeadlines()
+
+    def testRaisesWhenOverTime(self):
+        timed = TimeoutFunction(spin, 0.05)
+        self.assertRaises(TimeoutFunctionException, timed, 5)
+        self.assertTrue(timed.elapsed < 1)
+        self.assertNoDeadlines()
+
+    def testNestedTimeouts(self):
+        inner = TimeoutFunction(spin, 0.05)
+
+        def outer():
+            self.assertRaises(TimeoutFunctionException, inner, 5)
+            remaining = util.getTimeRemaining()
+            self.assertTrue(remaining != None and remaining > 0)
+            return spin(0.01)
+
+        self.assertEqual(TimeoutFunction(outer, 2.0)(), 0.01)
+        self.assertNoDeadlines()
+
+    def testEnclosingTimeoutStopsInnerCalls(self):
+        # The outer deadline passes while inner calls start and stop; none
+        # of their deadlines may be left behind, or fire later
+        inner = TimeoutFunction(spin, 0.2)
+
+        def outer():
+            while True:
+                inner(0)
+
+        for i in range(20):
+            self.assertRaises(TimeoutFunctionException,
+                              TimeoutFunction(outer, 0.01))
+            self.assertNoDeadlines()
+        spin(0.3)
+        self.assertNoDeadlines()
+
+    def testTimesOutInOtherThreads(self):
+        results = []
+
+        def run():
+            try:
+                TimeoutFunction(spin, 0.05)(5)
+                results.append('finished')
+            except TimeoutFunctionException:
+                results.append('timed out')
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join(5)
+        self.assertEqual(results, ['timed out'])
+
+
+if __name__ == '__main__':
+    unittest.main()
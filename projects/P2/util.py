@@ -28,6 +28,7 @@
 
 import sys
 import inspect
+import os
 import heapq
 import random
 import io
@@ -181,38 +182,109 @@ class PriorityQueue:
     has a priority associated with it and the client is usually interested
     in quick retrieval of the lowest-priority item in the queue. This
     data structure allows O(1) access to the lowest-priority item.
+
+    The first update or membership test (item in queue) indexes the heap
+    by item, so items must then be hashable; from then on update is an
+    O(log n) decrease-key instead of a scan and rebuild.  Queues that are
+    only pushed and popped are never indexed.  An item pushed more than
+    once is held once per push; update changes the copy popped first.
     """
 
     def __init__(self):
+        # Entries are [priority, count, item, position in heap]; the unique
+        # count breaks ties in push order, so items are never compared
         self.heap = []
         self.count = 0
+        # item -> the entries holding it, built on first use by getIndex
+        self.index = None
 
     def push(self, item, priority):
-        entry = (priority, self.count, item)
-        heapq.heappush(self.heap, entry)
+        entry = [priority, self.count, item, len(self.heap)]
         self.count += 1
+        if self.index == None:
+            heapq.heappush(self.heap, entry)
+        else:
+            self.heap.append(entry)
+            self.index.setdefault(item, []).append(entry)
+            self._siftUp(entry[3])
 
     def pop(self):
-        (_, _, item) = heapq.heappop(self.heap)
-        return item
+        if self.index == None:
+            return heapq.heappop(self.heap)[2]
+        heap = self.heap
+        entry = heap[0]
+        last = heap.pop()
+        if heap:
+            heap[0] = last
+            last[3] = 0
+            self._siftDown(0)
+        entries = self.index[entry[2]]
+        if len(entries) == 1:
+            del self.index[entry[2]]
+        else:
+            entries.remove(entry)
+        return entry[2]
 
     def isEmpty(self):
         return len(self.heap) == 0
 
+    def __contains__(self, item):
+        return item in self.getIndex()
+
     def update(self, item, priority):
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
         # If item not in priority queue, do the same thing as self.push.
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
-                break
-        else:
+        entries = self.getIndex().get(item)
+        if entries == None:
             self.push(item, priority)
+            return
+        entry = min(entries)
+        if entry[0] <= priority:
+            return
+        entry[0] = priority
+        self._siftUp(entry[3])
+
+    def getIndex(self):
+        if self.index == None:
+            index = {}
+            for position, entry in enumerate(self.heap):
+                entry[3] = position
+                index.setdefault(entry[2], []).append(entry)
+            self.index = index
+        return self.index
+
+    def _siftUp(self, position):
+        heap = self.heap
+        entry = heap[position]
+        while position > 0:
+            parentPosition = (position - 1) >> 1
+            parent = heap[parentPosition]
+            if not entry < parent:
+                break
+            heap[position] = parent
+            parent[3] = position
+            position = parentPosition
+        heap[position] = entry
+        entry[3] = position
+
+    def _siftDown(self, position):
+        heap = self.heap
+        size = len(heap)
+        entry = heap[position]
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if not heap[child] < entry:
+                break
+            heap[position] = heap[child]
+            heap[position][3] = position
+            position = child
+        heap[position] = entry
+        entry[3] = position
 
 
 class PriorityQueueWithFunction(PriorityQueue):
@@ -641,13 +713,15 @@ def pause():
 
 # code to handle timeouts
 #
-# FIXME
-# NOTE: TimeoutFuncton is NOT reentrant.  Later timeouts will silently
-# disable earlier timeouts.  Could be solved by maintaining a global list
-# of active time outs.  Currently, questions which have test cases calling
-# this have all student code so wrapped.
+# A single watchdog thread per process keeps the deadlines of every running
+# TimeoutFunction.  When one passes, it raises TimeoutFunctionException in
+# the thread that is over time.  This works in any thread, not just the main
+# one, to well under a millisecond, and timeouts nest.  The exception is
+# delivered the next time that thread runs Python code, so a call blocked in
+# C is only stopped when it returns; the elapsed time is checked then too.
 #
-import signal
+import ctypes
+import threading
 import time
 
 
@@ -656,32 +730,175 @@ class TimeoutFunctionException(Exception):
     pass
 
 
+class _Deadline:
+    def __init__(self, deadline, threadId, stack):
+        self.deadline = deadline
+        self.threadId = threadId
+        # The running deadlines of the thread, innermost last
+        self.stack = stack
+        self.active = True
+        self.fired = False
+
+
+class _Watchdog:
+    """
+    The thread that enforces the deadlines of running TimeoutFunctions.
+    """
+
+    def __init__(self):
+        self.pid = None
+        self.local = threading.local()
+
+    def _ensureRunning(self):
+        # A forked child inherits the state but not the thread
+        if self.pid == os.getpid():
+            return
+        self.pid = os.getpid()
+        # The timed threads only ever take plain locks, whose acquire and
+        # release are single C calls, so a timeout landing in start or stop
+        # cannot leave one held
+        self.lock = threading.Lock()
+        # Released to wake the watchdog when a new deadline comes first
+        self.wakeup = threading.Lock()
+        self.wakeup.acquire()
+        self.deadlines = []
+        self.count = 0
+        thread = threading.Thread(target=self._run, name='TimeoutWatchdog')
+        thread.daemon = True
+        thread.start()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                now = time.time()
+                while self.deadlines and self.deadlines[0][0] <= now:
+                    deadline = heapq.heappop(self.deadlines)[2]
+                    # A deadline an interrupted start or stop failed to
+                    # switch off is gone from the stack once its caller is
+                    if deadline.active and deadline in deadline.stack:
+                        deadline.fired = True
+                        _raiseInThread(deadline.threadId,
+                                       TimeoutFunctionException)
+                timeout = -1
+                if self.deadlines:
+                    timeout = self.deadlines[0][0] - now
+            self.wakeup.acquire(True, timeout)
+
+    def _wake(self):
+        try:
+            self.wakeup.release()
+        except RuntimeError:
+            # Already released, and the watchdog has not woken yet
+            pass
+
+    def start(self, timeout):
+        self._ensureRunning()
+        stack = self._stack()
+        deadline = _Deadline(time.time() + timeout, threading.get_ident(), stack)
+        stack.append(deadline)
+        try:
+            with self.lock:
+                self.count += 1
+                heapq.heappush(self.deadlines,
+                               (deadline.deadline, self.count, deadline))
+                first = self.deadlines[0][2] is deadline
+            if first:
+                self._wake()
+        except BaseException:
+            # An enclosing deadline passed; the caller never sees this one
+            self.stop(deadline)
+            raise
+        return deadline
+
+    def stop(self, deadline):
+        # A pending exception, from this deadline or an enclosing one, can
+        # land between any two lines here.  The stack entry goes first, with
+        # any left above it by inner calls that were cut short, and the
+        # deadline is switched off even if that is interrupted.
+        try:
+            stack = self._stack()
+            for index in range(len(stack) - 1, -1, -1):
+                if stack[index] is deadline:
+                    del stack[index:]
+                    break
+        finally:
+            with self.lock:
+                deadline.active = False
+                fired = deadline.fired
+            if fired:
+                # Drop the exception if it has not been delivered yet; the
+                # caller raises its own
+                _raiseInThread(deadline.threadId, None)
+
+    def _stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def timeRemaining(self):
+        stack = self._stack()
+        if not stack:
+            return None
+        return min([deadline.deadline for deadline in stack]) - time.time()
+
+
+def _raiseInThread(threadId, exceptionType):
+    """
+    Asynchronously raises exceptionType in the thread with threadId, or
+    cancels a pending exception if exceptionType is None.
+    """
+    pythonApi = getattr(ctypes, 'pythonapi', None)
+    if pythonApi == None:
+        return
+    if exceptionType == None:
+        pythonApi.PyThreadState_SetAsyncExc(ctypes.c_ulong(threadId), None)
+    else:
+        pythonApi.PyThreadState_SetAsyncExc(ctypes.c_ulong(threadId),
+                                            ctypes.py_object(exceptionType))
+
+
+_WATCHDOG = _Watchdog()
+
+
+def getTimeRemaining():
+    """
+    Returns the seconds left before the innermost deadline of the
+    TimeoutFunctions running on this thread, or None if none is running.
+    Agents can use this to search for as long as their move budget allows.
+    """
+    return _WATCHDOG.timeRemaining()
+
+
 class TimeoutFunction:
+    """
+    Wraps function so that calls raise TimeoutFunctionException if they run
+    for longer than timeout seconds, which may be fractional.  After each
+    call, elapsed holds the seconds it took and budgetUsed the fraction of
+    the timeout that was.
+    """
+
     def __init__(self, function, timeout):
         self.timeout = timeout
         self.function = function
-
-    def handle_timeout(self, signum, frame):
-        raise TimeoutFunctionException()
+        self.elapsed = None
+        self.budgetUsed = None
 
     def __call__(self, *args, **keyArgs):
-        # If we have SIGALRM signal, use it to cause an exception if and
-        # when this function runs too long.  Otherwise check the time taken
-        # after the method has returned, and throw an exception then.
-        if hasattr(signal, 'SIGALRM'):
-            old = signal.signal(signal.SIGALRM, self.handle_timeout)
-            signal.alarm(self.timeout)
+        startTime = time.time()
+        deadline = None
+        try:
+            deadline = _WATCHDOG.start(self.timeout)
+            result = self.function(*args, **keyArgs)
+        finally:
             try:
-                result = self.function(*args, **keyArgs)
+                if deadline != None:
+                    _WATCHDOG.stop(deadline)
             finally:
-                signal.signal(signal.SIGALRM, old)
-            signal.alarm(0)
-        else:
-            startTime = time.time()
-            result = self.function(*args, **keyArgs)
-            timeElapsed = time.time() - startTime
-            if timeElapsed >= self.timeout:
-                self.handle_timeout(None, None)
+                self.elapsed = time.time() - startTime
+                if self.timeout > 0:
+                    self.budgetUsed = self.elapsed / self.timeout
+        if deadline.fired or self.elapsed >= self.timeout:
+            raise TimeoutFunctionException()
         return result
 
 
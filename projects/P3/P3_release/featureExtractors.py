@@ -41,10 +41,13 @@ class CoordinateExtractor(FeatureExtractor):
         feats['action=%s' % action] = 1.0
         return feats
 
-def closestFood(pos, food, walls):
+def closestFood(pos, food, walls, legalNeighbors=None):
     """
     closestFood -- this is similar to the function that we have
     worked on in the search project; here its all in one place
+
+    legalNeighbors is an optional precomputed table of neighbors by cell
+    (see Layout.legalNeighbors) to use instead of probing the walls.
     """
     fringe = [(pos[0], pos[1], 0)]
     expanded = set()
@@ -57,7 +60,10 @@ def closestFood(pos, food, walls):
         if food[pos_x][pos_y]:
             return dist
         # otherwise spread out from the location to its neighbours
-        nbrs = Actions.getLegalNeighbors((pos_x, pos_y), walls)
+        if legalNeighbors != None:
+            nbrs = legalNeighbors[(pos_x, pos_y)]
+        else:
+            nbrs = Actions.getLegalNeighbors((pos_x, pos_y), walls)
         for nbr_x, nbr_y in nbrs:
             fringe.append((nbr_x, nbr_y, dist+1))
     # no food found
@@ -94,7 +100,8 @@ class SimpleExtractor(FeatureExtractor):
         if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
             features["eats-food"] = 1.0
 
-        dist = closestFood((next_x, next_y), food, walls)
+        dist = closestFood((next_x, next_y), food, walls,
+                           state.data.layout.legalNeighbors)
         if dist is not None:
             # make the distance a number less than one otherwise the update
             # will diverge wildly
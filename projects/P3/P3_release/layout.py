@@ -14,6 +14,7 @@
 
 from util import manhattanDistance
 from game import Grid
+from game import Actions
 import os
 import random
 from functools import reduce
@@ -35,6 +36,9 @@ class Layout:
         self.agentPositions = []
         self.numGhosts = 0
         self.processLayoutText(layoutText)
+        self.legalActions = {}
+        self.legalNeighbors = {}
+        self.computeMoveTables()
         self.layoutText = layoutText
         self.totalFood = len(self.food.asList())
         # self.initializeVisibilityMatrix()
@@ -97,7 +101,9 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        # Layouts are never changed after they are built, so every copy can
+        # share this one and its move tables
+        return self
 
     def processLayoutText(self, layoutText):
         """
@@ -120,6 +126,29 @@ class Layout:
         self.agentPositions.sort()
         self.agentPositions = [(i == 0, pos) for i, pos in self.agentPositions]
 
+    def computeMoveTables(self):
+        """
+        Precomputes, for every open cell, the legal actions there (in the
+        order Actions.getPossibleActions gives them, Stop included) and the
+        cell each action leads to, so legalNeighbors[cell][i] is where
+        legalActions[cell][i] goes.  Only integer cells are tabled; agents
+        between cells fall back to Actions.getPossibleActions.
+        """
+        for x in range(self.width):
+            for y in range(self.height):
+                if self.walls[x][y]:
+                    continue
+                actions, neighbors = [], []
+                for action, (dx, dy) in Actions._directionsAsList:
+                    nextx, nexty = x + dx, y + dy
+                    if nextx < 0 or nextx == self.width or nexty < 0 or nexty == self.height:
+                        continue
+                    if not self.walls[nextx][nexty]:
+                        actions.append(action)
+                        neighbors.append((nextx, nexty))
+                self.legalActions[(x, y)] = tuple(actions)
+                self.legalNeighbors[(x, y)] = tuple(neighbors)
+
     def processLayoutChar(self, x, y, layoutChar):
         if layoutChar == '%':
             self.walls[x][y] = True
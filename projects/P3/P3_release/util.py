@@ -208,38 +208,109 @@ class PriorityQueue:
     has a priority associated with it and the client is usually interested
     in quick retrieval of the lowest-priority item in the queue. This
     data structure allows O(1) access to the lowest-priority item.
+
+    The first update or membership test (item in queue) indexes the heap
+    by item, so items must then be hashable; from then on update is an
+    O(log n) decrease-key instead of a scan and rebuild.  Queues that are
+    only pushed and popped are never indexed.  An item pushed more than
+    once is held once per push; update changes the copy popped first.
     """
 
     def __init__(self):
+        # Entries are [priority, count, item, position in heap]; the unique
+        # count breaks ties in push order, so items are never compared
         self.heap = []
         self.count = 0
+        # item -> the entries holding it, built on first use by getIndex
+        self.index = None
 
     def push(self, item, priority):
-        entry = (priority, self.count, item)
-        heapq.heappush(self.heap, entry)
+        entry = [priority, self.count, item, len(self.heap)]
         self.count += 1
+        if self.index == None:
+            heapq.heappush(self.heap, entry)
+        else:
+            self.heap.append(entry)
+            self.index.setdefault(item, []).append(entry)
+            self._siftUp(entry[3])
 
     def pop(self):
-        (_, _, item) = heapq.heappop(self.heap)
-        return item
+        if self.index == None:
+            return heapq.heappop(self.heap)[2]
+        heap = self.heap
+        entry = heap[0]
+        last = heap.pop()
+        if heap:
+            heap[0] = last
+            last[3] = 0
+            self._siftDown(0)
+        entries = self.index[entry[2]]
+        if len(entries) == 1:
+            del self.index[entry[2]]
+        else:
+            entries.remove(entry)
+        return entry[2]
 
     def isEmpty(self):
         return len(self.heap) == 0
 
+    def __contains__(self, item):
+        return item in self.getIndex()
+
     def update(self, item, priority):
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
         # If item not in priority queue, do the same thing as self.push.
-        for index, (p, c, i) in enumerate(self.heap):
-            if i == item:
-                if p <= priority:
-                    break
-                del self.heap[index]
-                self.heap.append((priority, c, item))
-                heapq.heapify(self.heap)
-                break
-        else:
+        entries = self.getIndex().get(item)
+        if entries == None:
             self.push(item, priority)
+            return
+        entry = min(entries)
+        if entry[0] <= priority:
+            return
+        entry[0] = priority
+        self._siftUp(entry[3])
+
+    def getIndex(self):
+        if self.index == None:
+            index = {}
+            for position, entry in enumerate(self.heap):
+                entry[3] = position
+                index.setdefault(entry[2], []).append(entry)
+            self.index = index
+        return self.index
+
+    def _siftUp(self, position):
+        heap = self.heap
+        entry = heap[position]
+        while position > 0:
+            parentPosition = (position - 1) >> 1
+            parent = heap[parentPosition]
+            if not entry < parent:
+                break
+            heap[position] = parent
+            parent[3] = position
+            position = parentPosition
+        heap[position] = entry
+        entry[3] = position
+
+    def _siftDown(self, position):
+        heap = self.heap
+        size = len(heap)
+        entry = heap[position]
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if not heap[child] < entry:
+                break
+            heap[position] = heap[child]
+            heap[position][3] = position
+            position = child
+        heap[position] = entry
+        entry[3] = position
 
 
 class PriorityQueueWithFunction(PriorityQueue):
@@ -0,0 +1,127 @@
+# benchmark.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Timing harness for the distance and inference code.
+
+  python benchmark.py -l bigHunt            # time every benchmark on bigHunt
+  python benchmark.py -b distances -l FILE.lay --json
+
+With --json the results are printed as a single JSON object, which is how
+the scaling benchmark in the multiagent project collects them.
+"""
+
+import optparse
+import random
+import sys
+import time
+
+import busters
+import distanceCalculator
+import ghostAgents
+import inference
+import layout
+
+
+def benchmarkDistances(lay, options):
+    """
+    Times computeDistances, the all-pairs maze distance table.
+    """
+    startTime = time.time()
+    distances = distanceCalculator.computeDistances(lay)
+    return {'seconds': time.time() - startTime, 'pairs': len(distances)}
+
+
+def benchmarkParticleFilter(lay, options):
+    """
+    Times the observe and elapseTime updates of a ParticleFilter tracking
+    the first ghost as it wanders at random, with two particles per square.
+    """
+    random.seed(0)
+    start = busters.GameState()
+    start.initialize(lay, lay.getNumGhosts())
+    ghost = ghostAgents.RandomGhost(1)
+    tracker = inference.ParticleFilter(ghost)
+    tracker.initialize(start)
+    tracker.setNumParticles(2 * len(tracker.legalPositions))
+    tracker.initializeUniformly(start)
+
+    state = start
+    observeTime = elapseTime = 0.0
+    for step in range(options.steps):
+        if state.isWin() or state.isLose():
+            state = start
+        state = state.getResult(1, ghost.getAction(state))
+        startTime = time.time()
+        tracker.elapseTime(state.deepCopy())
+        elapseTime += time.time() - startTime
+        startTime = time.time()
+        tracker.observe(state.deepCopy())
+        observeTime += time.time() - startTime
+    return {'particles': tracker.numParticles, 'steps': options.steps,
+            'elapseSecondsPerStep': elapseTime / options.steps,
+            'observeSecondsPerStep': observeTime / options.steps}
+
+
+BENCHMARKS = [
+    ('distances', benchmarkDistances),
+    ('particleFilter', benchmarkParticleFilter),
+]
+
+
+def readCommand(argv):
+    parser = optparse.OptionParser(
+        usage='python benchmark.py [options]')
+    parser.add_option('-b', '--benchmark', dest='benchmarks', action='append',
+                      help='Benchmark to run (may be repeated): %s' %
+                      ', '.join([name for name, fn in BENCHMARKS]))
+    parser.add_option('-l', '--layout', dest='layout', default='smallHunt',
+                      help='Layout name or .lay file to run on [Default: %default]')
+    parser.add_option('-s', '--steps', dest='steps', type='int', default=20,
+                      help='Particle filter updates to time [Default: %default]')
+    parser.add_option('--json', dest='json', action='store_true', default=False,
+                      help='Print the results as one JSON object')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    known = dict(BENCHMARKS)
+    for name in options.benchmarks or []:
+        if name not in known:
+            raise Exception('Unknown benchmark: ' + name)
+    return options
+
+
+def runBenchmarks(options):
+    lay = layout.getLayout(options.layout)
+    if lay == None:
+        raise Exception('The layout ' + options.layout + ' cannot be found')
+    selected = options.benchmarks or [name for name, fn in BENCHMARKS]
+    results = {}
+    for name, fn in BENCHMARKS:
+        if name in selected:
+            results[name] = fn(lay, options)
+    return results
+
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    results = runBenchmarks(options)
+    if options.json:
+        import json
+        print(json.dumps(results, sort_keys=True))
+    else:
+        for name, figures in results.items():
+            print(name)
+            for key in sorted(figures):
+                print('  %-24s %s' % (key, figures[key]))